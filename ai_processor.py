@@ -1,203 +1,527 @@
-from crewai import Agent, Task, Crew, Process
 import os
 import json
-from langchain_groq import ChatGroq
-# Import the amazon and flipkart modules
+import asyncio
+import time
+from concurrent.futures import as_completed
+# Importing a store module registers its marketplace adapter
 import amazon
 import flipkart
+import marketplaces
+import browser_pool
+import metrics
+import llm_clients
+import prompt_budget
+from product_cache import cache as product_cache, normalize_query
+import semantic_cache
+import conversation_context
+import price_history
+from product_parser import parse_product, split_items
+from singleflight import SingleFlight, ThreadSingleFlight
+from response_renderer import render_response, render_batch, render_cheapest, render_deal_line, describe_product
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Initialize the Groq LLM with environment variable
+# crewai and browser_use are imported on first use (or by warmup.py), not here,
+# so importing the web app stays fast
+
+# Coalesce identical concurrent crew extractions and store lookups
+extractions = ThreadSingleFlight("extract")
+store_lookups = SingleFlight("store_lookup")
+
+# Parser results below this confidence are re-extracted by the LLM crew
+PARSER_MIN_CONFIDENCE = float(os.getenv("PARSER_MIN_CONFIDENCE", "0.7"))
+
+# Set POLISH_RESPONSES=1 to have the Response Generator crew rewrite replies
+POLISH_RESPONSES = os.getenv("POLISH_RESPONSES", "0") == "1"
+
+# Most items compared from one message or bulk request
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "10"))
+# Store lookups from batches allowed in flight at once, across all batches, so
+# a long shopping list or bulk job can't take over the browser and LLM pools
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "6"))
+batch_slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+# Get the shared Groq LLM (built once per process, see llm_clients). Only the
+# crew steps need it, so turns the local parser and renderer can answer never
+# build it, and work without a GROQ_API_KEY
 def initialize_llm():
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        os.environ["GROQ_API_KEY"] = "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"
-    
-    return ChatGroq(
-        model_name="groq/llama3-8b-8192",
-        temperature=0.7,
-    )
+    return llm_clients.groq_llm()
+
+def extract_product_details(user_input):
+    """Extract product details, using the local parser and falling back to CrewAI"""
+    details, confidence = parse_product(user_input)
+    if confidence >= PARSER_MIN_CONFIDENCE:
+        return details
+    if not llm_clients.has_groq_key():
+        # No crew to ask: search for what the parser found, or the message as typed
+        return details if details.get("product") else {"product": user_input}
+    # Identical messages arriving together share one crew run
+    key = " ".join(user_input.lower().split())
+    return extractions.do(key, lambda: parse_crew_details(extract_product_details_with_crew(user_input, initialize_llm()), user_input))
+
+def parse_crew_details(crew_output, user_input):
+    """Turn the Product Parser crew output into a details dict"""
+    raw = crew_output.raw if hasattr(crew_output, 'raw') else str(crew_output)
+    start, end = raw.find("{"), raw.rfind("}")
+    if start != -1 and end > start:
+        try:
+            details = json.loads(raw[start:end + 1])
+            if isinstance(details, dict) and details.get("product"):
+                return details
+        except ValueError:
+            pass
+    # Fall back to searching for the message as typed
+    return {"product": user_input}
 
-def extract_product_details(user_input, llm):
+def extract_product_details_with_crew(user_input, llm):
     """Extract product details from user input using CrewAI"""
-    product_name_extractor = Agent(
-        role="Product Parser",
-        goal="Extract product details from user input",
-        backstory="""You analyze user queries to identify product names, quantities, and filters.""",
-        verbose=True,
-        allow_delegation=False,
-        llm=llm
-    )
+    from crewai import Task, Crew
+    product_name_extractor = llm_clients.agent("product_parser", llm)
     
+    description, expected_output = prompt_budget.extraction_prompt(user_input)
     product_name_extractor_task = Task(
-        description=f"""
-            from the user input for product search details: "{user_input}"
-           
-            Extract:
-            1. Product name
-            2. Quantity/volume (if specified)
-            3. Price constraints (if specified)
-            4. Any other relevant filters
-            
-            example:
-            input=Wild Stone Edge EDP Premium Perfume for Men, 100 Ml
-            
-            output=
-                product:Wild Stone Edge EDP Premium Perfume for Men,
-                quantity: 100 Ml
-            """,
-            
-        expected_output="""Return the results as a JSON object with these fields (include only if present in input):
-            
-                "product": "extracted product name",
-                "quantity": "extracted quantity/volume",
-                "price_max": maximum price (number only),
-                "other_filters": "any other specifications"
-            """,
+        description=description,
+        expected_output=expected_output,
         agent=product_name_extractor
     )
     
     # Create and run the crew
     crew = Crew(agents=[product_name_extractor], tasks=[product_name_extractor_task])
-    return crew.kickoff()
+    result = crew.kickoff()
+    metrics.record_crew_output("product_parser", result)
+    return result
 
-def get_amazon_details(product_details):
-    """Fetch product details from Amazon using the amazon module"""
+async def lookup_store(store, product_details, timeout=None, refresh=False):
+    """Run one store lookup with a timeout, returning a fallback on failure
+
+    refresh=True skips the cache and fetches a new result to cache.
+    """
+    adapter = marketplaces.get_adapter(store)
+    timeout = timeout or adapter.timeout
+    query = normalize_query(product_details)
+    cached = None if refresh else product_cache.get(store, query)
+    if cached is not None:
+        return cached
+    # Identical lookups already in flight are joined rather than repeated
+    return await store_lookups.do(
+        (store, query),
+        lambda: fetch_store(adapter, product_details, query, timeout)
+    )
+
+async def fetch_store(adapter, product_details, query, timeout):
+    """Query a store through its breaker and rate limiter, caching real answers"""
+    store = adapter.name
+    # Fail fast while the store is degraded instead of waiting out another timeout
+    if not adapter.breaker.allow():
+        metrics.store_fast_fails.inc(store=store, reason="circuit_open")
+        return unavailable_result(store, query)
+    started = time.monotonic()
     try:
-        # Call the amazon module's function to get real data
-        amazon_data = amazon.get_amazon_output(product_details)
-        
-        # If the result is a string (likely JSON), parse it
-        if isinstance(amazon_data, str):
-            try:
-                amazon_data = json.loads(amazon_data)
-            except:
-                pass
-        
-        return amazon_data
+        # Waiting for a rate limit token counts against the lookup's deadline
+        if not await adapter.rate_limiter.acquire(timeout):
+            adapter.breaker.release_probe()
+            metrics.store_fast_fails.inc(store=store, reason="rate_limited")
+            return unavailable_result(store, query)
+        remaining = timeout - (time.monotonic() - started)
+        with metrics.stage(f"lookup:{store}"):
+            result = await asyncio.wait_for(adapter.lookup(product_details), remaining)
+    except asyncio.TimeoutError:
+        adapter.breaker.record_failure()
+        print(f"Timed out getting {store} details after {timeout}s")
+        return adapter.fallback("Timed out retrieving product")
+    except asyncio.CancelledError:
+        adapter.breaker.release_probe()
+        raise
     except Exception as e:
-        print(f"Error getting Amazon details: {e}")
-        # Fallback response if there's an error
-        return {
-            "product_name": "Error retrieving product",
-            "price": "N/A",
-            "rating": "N/A",
-            "purchase_url": "https://www.amazon.in"
-        }
+        adapter.breaker.record_failure()
+        print(f"Error getting {store} details: {e}")
+        return adapter.fallback()
+    adapter.breaker.record_success()
+    # Only real answers are cached and recorded; fallbacks above are not
+    product_cache.set(store, query, result)
+    if price_history.PRICE_HISTORY:
+        price_history.history.record_result(store, query, result)
+    return result
+
+def unavailable_result(store, query):
+    """Last known result for a degraded store, or a "temporarily unavailable" fallback"""
+    stale = product_cache.get_stale(store, query)
+    if stale is not None:
+        return stale
+    return marketplaces.get_adapter(store).fallback("Temporarily unavailable")
+
+async def lookup_stores(product_details, stores=None, timeout=None):
+    """Query all registered stores concurrently on one event loop"""
+    stores = list(stores or marketplaces.adapters())
+    results = await asyncio.gather(
+        *(lookup_store(store, product_details, timeout) for store in stores)
+    )
+    return dict(zip(stores, results))
+
+def get_store_details(product_details, stores=None, timeout=None):
+    """Fetch product details from every store in parallel, with partial results if one fails"""
+    # Store agents share the browser pool, so they must run on its event loop
+    return browser_pool.run(lookup_stores(product_details, stores, timeout))
+
+def get_amazon_details(product_details):
+    """Fetch product details from Amazon using the amazon module"""
+    return get_store_details(product_details, ["amazon"])["amazon"]
 
 def get_flipkart_details(product_details):
     """Fetch product details from Flipkart using the flipkart module"""
-    try:
-        # Call the flipkart module's function to get real data
-        flipkart_data = flipkart.get_flipkart_output(product_details)
-        
-        # If the result is a string (likely JSON), parse it
-        if isinstance(flipkart_data, str):
-            try:
-                flipkart_data = json.loads(flipkart_data)
-            except:
-                pass
-        
-        return flipkart_data
-    except Exception as e:
-        print(f"Error getting Flipkart details: {e}")
-        # Fallback response if there's an error
-        return {
-            "product_name": "Error retrieving product",
-            "price": "N/A",
-            "rating": "N/A",
-            "purchase_url": "https://www.flipkart.com"
-        }
-
-def generate_response(user_input, product_details, amazon_details, flipkart_details, llm):
+    return get_store_details(product_details, ["flipkart"])["flipkart"]
+
+def generate_response(user_input, product_details, store_details):
+    """Render the comparison reply, optionally polished by the LLM crew"""
+    if POLISH_RESPONSES and llm_clients.has_groq_key():
+        return generate_response_with_crew(user_input, product_details, store_details, initialize_llm())
+    return render_response(user_input, product_details, store_details)
+
+def generate_response_with_crew(user_input, product_details, store_details, llm):
     """Generate a user-friendly response with CrewAI"""
-    response_generator_agent = Agent(
-        role="Response Generator",
-        goal="Create personalized, user-friendly responses",
-        backstory="""You transform technical product information into friendly,
-        helpful responses that highlight the most relevant information for the user.""",
-        verbose=True,
-        allow_delegation=False,
-        llm=llm
-    )
+    from crewai import Task, Crew
+    response_generator_agent = llm_clients.agent("response_generator", llm)
     
+    labels = [marketplaces.get_adapter(store).label for store in store_details]
+    # Cached instructions plus the results cut down to what the reply shows
+    description, expected_output = prompt_budget.response_prompt(user_input, labels, store_details)
     response_generator_agent_task = Task(
-        description=f"""
-        Generate a short and user-friendly response for the product: {user_input}.
-        
-        best deal for this product on amazon:
-        Amazon product details: {amazon_details}
-        
-        best deal for this product on flipkart:
-        Flipkart product details: {flipkart_details}
-        
-        The response should:
-        - Start with a warm greeting.
-        - Mention the product name clearly.
-        - Present the best deal info from both Amazon and Flipkart in the following format:
-        
-        Product: <Product Name>
-        
-        Amazon Deal:
-        1. Full product name (as shown on Amazon)
-        2. Current minimum price
-        3. Average rating
-        4. Direct purchase URL
-        
-        Flipkart Deal:
-        1. Full product name (as shown on Flipkart)
-        2. Current minimum price
-        3. Average rating
-        4. Direct purchase URL
-        
-        Additional instructions:
-        - Use appropriate emojis in the final output to enhance user experience.
-        - Keep the response concise and well-formatted.
-        - Focus mainly on price and direct purchase links.
-        """,
-        expected_output="A short, friendly, emoji-enhanced response showing Amazon and Flipkart deals with a clear focus on pricing and buy links.",
+        description=description,
+        expected_output=expected_output,
         agent=response_generator_agent
     )
     
     # Create and run the crew
     crew = Crew(agents=[response_generator_agent], tasks=[response_generator_agent_task])
     result = crew.kickoff()
+    metrics.record_crew_output("response_generator", result)
     
     # Return the raw output from the Response Generator agent
     return result
 
+def parsed_event(product_details, user_input):
+    return {
+        "stage": "parsed",
+        "product": product_details,
+        "text": f"🔎 Searching for {describe_product(product_details, user_input)}...",
+    }
+
+def store_event(store, result):
+    return {
+        "stage": "store",
+        "store": store,
+        "result": result,
+        "text": render_deal_line(store, result),
+    }
+
+def final_event(response):
+    if hasattr(response, 'raw'):
+        response = response.raw
+    return {"stage": "final", "response": str(response)}
+
+def iter_pipeline(user_input, stores=None, timeout=None):
+    """Run the chat pipeline, yielding an event as each stage finishes
+
+    Events are dicts with a "stage" key:
+    - "parsed": the extracted product details
+    - "store": one store's result, in the order the stores finish
+    - "final": the complete reply
+    """
+    # Initialize LLM
+    # Extract product details
+    with metrics.stage("extract"):
+        product_details = extract_product_details(user_input)
+    yield parsed_event(product_details, user_input)
+    
+    # Look up every store at once on the browser loop and report each as it finishes
+    stores = list(stores or marketplaces.adapters())
+    futures = {
+        browser_pool.submit(lookup_store(store, product_details, timeout)): store
+        for store in stores
+    }
+    store_details = {}
+    for future in as_completed(futures):
+        store = futures[future]
+        store_details[store] = future.result()
+        yield store_event(store, store_details[store])
+    
+    # Generate response - this is directly passed to the user, with stores in registration order
+    store_details = {store: store_details[store] for store in stores}
+    with metrics.stage("generate"):
+        response = generate_response(user_input, product_details, store_details)
+    yield final_event(response)
+
+async def aiter_pipeline(user_input, stores=None, timeout=None):
+    """Async iter_pipeline for ASGI handlers: awaits instead of blocking a thread
+
+    Store lookups still run on the shared browser loop; the crew steps, which
+    block, run in the default executor.
+    """
+    with metrics.stage("extract"):
+        product_details = await asyncio.to_thread(extract_product_details, user_input)
+    yield parsed_event(product_details, user_input)
+    
+    stores = list(stores or marketplaces.adapters())
+    
+    async def lookup(store):
+        future = browser_pool.submit(lookup_store(store, product_details, timeout))
+        return store, await asyncio.wrap_future(future)
+    
+    store_details = {}
+    for next_done in asyncio.as_completed([lookup(store) for store in stores]):
+        store, result = await next_done
+        store_details[store] = result
+        yield store_event(store, result)
+    
+    store_details = {store: store_details[store] for store in stores}
+    with metrics.stage("generate"):
+        response = await asyncio.to_thread(generate_response, user_input, product_details, store_details)
+    yield final_event(response)
+
+async def compare_item(query, stores=None, timeout=None):
+    """Extract one batch item and look it up on every store, within the batch limit"""
+    product_details = await asyncio.to_thread(extract_product_details, query)
+    stores = list(stores or marketplaces.adapters())
+    
+    async def lookup(store):
+        async with batch_slots:
+            return await lookup_store(store, product_details, timeout)
+    
+    results = await asyncio.gather(*(lookup(store) for store in stores))
+    return {"query": query, "product": product_details, "stores": dict(zip(stores, results))}
+
+def iter_batch(queries, stores=None, timeout=None):
+    """Compare several products at once, yielding (index, row) as each item finishes"""
+    futures = {
+        browser_pool.submit(compare_item(query, stores, timeout)): index
+        for index, query in enumerate(queries)
+    }
+    for future in as_completed(futures):
+        index = futures[future]
+        try:
+            row = future.result()
+        except Exception as e:
+            # One failed item doesn't sink the rest of the list
+            print(f"Error comparing {queries[index]}: {e}")
+            row = {"query": queries[index], "product": None, "stores": {}, "error": str(e)}
+        yield index, row
+
+def compare_products(queries, stores=None, timeout=None, on_item=None):
+    """Rows for several product queries, in the order given"""
+    rows = [None] * len(queries)
+    for index, row in iter_batch(queries, stores, timeout):
+        rows[index] = row
+        if on_item:
+            on_item(index, row)
+    return rows
+
+def iter_batch_pipeline(user_input, items):
+    """iter_pipeline for a shopping list: one "item" event per product, then one combined reply"""
+    yield {
+        "stage": "parsed",
+        "items": items,
+        "text": f"🔎 Comparing {len(items)} items: {', '.join(items)}...",
+    }
+    rows = [None] * len(items)
+    with metrics.stage("batch_lookup"):
+        for index, row in iter_batch(items):
+            rows[index] = row
+            yield {
+                "stage": "item",
+                "index": index,
+                "row": row,
+                "text": f"✔️ {describe_product(row['product'], row['query'])}",
+            }
+    with metrics.stage("generate"):
+        response = render_batch(rows)
+    yield final_event(response)
+
+def iter_follow_up(user_input, follow_up, timeout=None):
+    """iter_pipeline for a follow-up: reuses the conversation's results and looks up only what changed"""
+    product_details = follow_up.product
+    store_details = dict(follow_up.known)
+    if follow_up.intent == "compare":
+        yield final_event(render_cheapest(user_input, product_details, {
+            store: store_details[store] for store in follow_up.order if store in store_details
+        }))
+        return
+    
+    yield parsed_event(product_details, user_input)
+    
+    futures = {
+        browser_pool.submit(lookup_store(store, product_details, timeout, refresh=follow_up.refresh)): store
+        for store in follow_up.stores
+    }
+    for future in as_completed(futures):
+        store = futures[future]
+        store_details[store] = future.result()
+        yield store_event(store, store_details[store])
+    
+    store_details = {store: store_details[store] for store in follow_up.order}
+    with metrics.stage("generate"):
+        response = generate_response(user_input, product_details, store_details)
+    yield final_event(response)
+
+def find_follow_up(user_input, conversation_id):
+    """The FollowUp a message asks for in its conversation, or None"""
+    if conversation_id is None or not conversation_context.CONVERSATION_CONTEXT:
+        return None
+    return conversation_context.follow_up(user_input, conversation_context.contexts.get(conversation_id))
+
+def remember_context(conversation_id, turn):
+    """Keep a single-product turn's results for follow-ups in the same conversation"""
+    if conversation_id is None or not conversation_context.CONVERSATION_CONTEXT:
+        return
+    if isinstance(turn["product"], dict) and turn["stores"]:
+        # Stores answer in whatever order they finish; follow-ups list them in registration order
+        registered = marketplaces.adapters()
+        stores = dict(sorted(
+            turn["stores"].items(),
+            key=lambda item: registered.index(item[0]) if item[0] in registered else len(registered),
+        ))
+        conversation_context.contexts.remember(conversation_id, turn["product"], stores)
+
+def forget_context(conversation_id):
+    if conversation_id is not None:
+        conversation_context.contexts.forget(conversation_id)
+
+def all_stores_answered(product_details, store_details):
+    """Whether every store gave a fresh answer; fallbacks and stale results aren't cached"""
+    query = normalize_query(product_details)
+    # A result served by unavailable_result is either a fallback, which is never
+    # cached, or an expired cache entry
+    return bool(store_details) and all(
+        product_cache.get_stale(store, query) == result and product_cache.expires_in(store, query) > 0
+        for store, result in store_details.items()
+    )
+
+def cached_reply(user_input, on_event=None):
+    """The turn that answered a paraphrase of this query, or None"""
+    if not semantic_cache.SEMANTIC_CACHE:
+        return None
+    entry = semantic_cache.cache.get_entry(user_input)
+    if entry is None:
+        return None
+    if on_event:
+        on_event({"stage": "final", "response": entry["response"], "cached": True})
+    return {"product": entry.get("product"), "stores": entry.get("stores") or {}, "response": entry["response"]}
+
+def new_turn():
+    return {"product": None, "stores": {}, "response": None}
+
+def record_event(turn, event):
+    """Collect what a pipeline event says about the turn"""
+    if event["stage"] == "parsed":
+        turn["product"] = event.get("product")
+    elif event["stage"] == "store":
+        turn["stores"][event["store"]] = event["result"]
+    elif event["stage"] == "final":
+        turn["response"] = event["response"]
+
+def remember_reply(user_input, turn):
+    """Keep the reply for paraphrases if every store answered"""
+    if semantic_cache.SEMANTIC_CACHE and all_stores_answered(turn["product"], turn["stores"]):
+        semantic_cache.cache.set(user_input, turn["response"], turn["product"], turn["stores"])
+
+def choose_pipeline(user_input, conversation_id=None, on_event=None):
+    """How to answer a message, as (kind, plan)
+
+    kind is "follow_up" (plan is the FollowUp), "batch" (plan is the item
+    list), "cached" (plan is the reply, already sent to on_event) or
+    "pipeline" for a full single-product turn.
+    """
+    # A follow-up about the last product reuses its results
+    follow_up = find_follow_up(user_input, conversation_id)
+    if follow_up:
+        metrics.follow_ups.inc(intent=follow_up.intent)
+        return "follow_up", follow_up
+    # A shopping list is compared in one pass instead of one turn per item,
+    # and has no one product to follow up on
+    items = split_items(user_input)[:MAX_BATCH_ITEMS]
+    if len(items) > 1:
+        forget_context(conversation_id)
+        return "batch", items
+    # A paraphrase of an already answered query skips the crew and store agents,
+    # and its product and results become the conversation's context
+    cached = cached_reply(user_input, on_event)
+    if cached is not None:
+        forget_context(conversation_id)
+        remember_context(conversation_id, cached)
+        return "cached", cached["response"]
+    return "pipeline", None
+
+def sync_pipeline(user_input, kind, plan):
+    """The event generator for a turn chosen by choose_pipeline"""
+    if kind == "follow_up":
+        return iter_follow_up(user_input, plan)
+    if kind == "batch":
+        return iter_batch_pipeline(user_input, plan)
+    return iter_pipeline(user_input)
+
+def run_pipeline(pipeline, on_event=None):
+    """Pass each event on to on_event and collect the turn"""
+    turn = new_turn()
+    for event in pipeline:
+        if on_event:
+            on_event(event)
+        record_event(turn, event)
+    return turn
+
+def finish_turn(user_input, conversation_id, kind, turn):
+    """Keep a finished turn for follow-ups and paraphrases; returns the reply"""
+    remember_context(conversation_id, turn)
+    # Follow-ups only make sense in their conversation, so they aren't shared
+    if kind != "follow_up":
+        remember_reply(user_input, turn)
+    return turn["response"]
+
 # Main function to process user input
-def process_user_message(user_input):
-    """Process user input and generate AI response"""
+def process_user_message(user_input, on_event=None, conversation_id=None):
+    """Process user input and generate AI response, reporting stage events to on_event
+
+    conversation_id lets follow-up questions reuse the conversation's last results.
+    """
     try:
-        # Initialize LLM
-        llm = initialize_llm()
-        
-        # Extract product details
-        product_details = extract_product_details(user_input, llm)
-        
-        # Get product details from Amazon and Flipkart
-        amazon_details = get_amazon_details(product_details)
-        flipkart_details = get_flipkart_details(product_details)
-        
-        # Generate response - this is directly passed to the user
-        response = generate_response(user_input, product_details, amazon_details, flipkart_details, llm)
-        
-        # Return the raw response from the Response Generator agent
-        return response
+        with metrics.trace("chat_turn"):
+            kind, plan = choose_pipeline(user_input, conversation_id, on_event)
+            if kind == "cached":
+                return plan
+            turn = run_pipeline(sync_pipeline(user_input, kind, plan), on_event)
+        return finish_turn(user_input, conversation_id, kind, turn)
+    except Exception as e:
+        print(f"Error processing message: {e}")
+        return f"I'm sorry, I couldn't process your request due to an error: {str(e)}"
+
+async def process_user_message_async(user_input, on_event=None, conversation_id=None):
+    """Awaitable process_user_message, for handlers running on an event loop"""
+    try:
+        with metrics.trace("chat_turn"):
+            kind, plan = choose_pipeline(user_input, conversation_id, on_event)
+            if kind == "cached":
+                return plan
+            if kind == "pipeline":
+                turn = new_turn()
+                async for event in aiter_pipeline(user_input):
+                    if on_event:
+                        on_event(event)
+                    record_event(turn, event)
+            else:
+                # Batch and follow-up lookups already run on the browser loop; only
+                # the thread collecting their events is borrowed
+                turn = await asyncio.to_thread(run_pipeline, sync_pipeline(user_input, kind, plan), on_event)
+        return finish_turn(user_input, conversation_id, kind, turn)
     except Exception as e:
         print(f"Error processing message: {e}")
         return f"I'm sorry, I couldn't process your request due to an error: {str(e)}"
 
 # Helper function to integrate with Flask app.py
-def process_user_input(user_input):
+def process_user_input(user_input, on_event=None, conversation_id=None):
     """Process user input from Flask app"""
     try:
         # Get the Response Generator's output
-        response = process_user_message(user_input)
+        response = process_user_message(user_input, on_event, conversation_id)
         
         # Convert to string if needed
         if hasattr(response, 'raw'):
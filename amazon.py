@@ -1,54 +1,64 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from browser_use import Agent
-from browser_use import Agent, Browser, BrowserConfig
 from dotenv import load_dotenv
-import asyncio
 import os
+import browser_pool
+import marketplaces
+import scrapers
 
 
 load_dotenv()
 
 
-api_key = os.getenv("GOOGLE_API_KEY")  
+def rating_value(node):
+    # "4.2 out of 5 stars" -> "4.2"
+    text = scrapers.text_of(node)
+    return text.split()[0] if text else "N/A"
 
-browser = Browser(
-    config=BrowserConfig(
-       
-        chrome_instance_path='C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe',  # macOS path
-      
-    )
-)
-initial_actions = [
-	{'open_tab': {'url': 'https://www.amazon.in/'}}
-]
-async def amazon(product_details):
-  
-    llm = ChatGoogleGenerativeAI(model='gemini-2.0-flash', api_key=api_key)
-    
-    agent = Agent(
-        task=f"""
-    
-        Find product information on Amazon:
-        - Product: {product_details}
-
-        - Required details:
-             1. Full product name (exact as shown on Amazon)
-             2. Current minimum price
-             3. Average rating
-            4. Direct purchase URL
-        - Format response as structured JSON data with these keys: "product_name", "price", "rating", "purchase_url"
-        - If multiple sellers exist, return the lowest price option from a reputable seller
-        - if particular product is not available on amazon, then return a message "Product not available on Amazon"
-        - Note: Return only factual information as displayed on the Amazon product page""",
-        llm=llm,
-        browser=browser,
-        initial_actions=initial_actions
-    )
-    result = await agent.run()
-    return result.final_result()
 
+class AmazonAdapter(marketplaces.MarketplaceAdapter):
+    name = "amazon"
+    label = "Amazon"
+    emoji = "🟠"
+    base_url = os.getenv("AMAZON_BASE_URL", "https://www.amazon.in")
+    search_path = "/s"
+    search_param = "k"
 
+    def parse_search_results(self, html):
+        """Organic results from an Amazon search page"""
+        page = scrapers.soup(html)
+        results = []
+        for card in page.select('div[data-component-type="s-search-result"]'):
+            if card.select_one(".puis-sponsored-label-text, .s-sponsored-label-text"):
+                continue
+            link = card.select_one("h2 a[href]") or card.select_one("a.a-link-normal[href*='/dp/']")
+            results.append({
+                "product_name": scrapers.text_of(card.select_one("h2 span") or card.select_one("h2")),
+                "price": scrapers.text_of(card.select_one(".a-price .a-offscreen")),
+                "rating": rating_value(card.select_one(".a-icon-alt")),
+                "purchase_url": scrapers.absolute_url(self.base_url, link["href"]) if link else "",
+            })
+        return results
 
-def get_amazon_output(input):
-    return asyncio.run(amazon(input))
+    def parse_product_page(self, html, url):
+        """Product details from an Amazon product page"""
+        page = scrapers.soup(html)
+        title = page.select_one("#productTitle")
+        if title is None:
+            return None
+        return {
+            "product_name": scrapers.text_of(title),
+            "price": scrapers.text_of(page.select_one(
+                "#corePrice_feature_div .a-offscreen, #corePriceDisplay_desktop_feature_div .a-offscreen, .a-price .a-offscreen"
+            )),
+            "rating": rating_value(page.select_one("#acrPopover .a-icon-alt")),
+            "purchase_url": url,
+        }
+
+
+adapter = marketplaces.register(AmazonAdapter())
 
+async def amazon(product_details):
+    return await adapter.lookup(product_details)
+
+
+def get_amazon_output(input):
+    return browser_pool.run(amazon(input))
@@ -1,17 +1,24 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, session, jsonify, g
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
 import json
 from datetime import datetime
 import uuid
+import time
 # Import the AI processor module
-from ai_processor import process_user_input
+from ai_processor import process_user_input, compare_products
+import jobs
+import db_config
+import migrations
+import refresher
+import warmup
+import metrics
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24).hex()
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///chatbot.db'
+db_config.configure_database(app)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 
@@ -30,6 +37,11 @@ class Conversation(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     messages = db.relationship('Message', backref='conversation', lazy=True)
+    
+    # Sidebar listing: a user's conversations, newest first
+    __table_args__ = (
+        db.Index('ix_conversation_user_created', 'user_id', 'created_at', 'id'),
+    )
 
 class Message(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -37,10 +49,76 @@ class Message(db.Model):
     is_user = db.Column(db.Boolean, default=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), nullable=False)
+    
+    # Message list: a conversation's messages in time order
+    __table_args__ = (
+        db.Index('ix_message_conversation_timestamp', 'conversation_id', 'timestamp', 'id'),
+    )
+
+# Page sizes for the sidebar and the message list
+CONVERSATIONS_PAGE_SIZE = 30
+MESSAGES_PAGE_SIZE = 50
+# Most queries accepted by one /api/compare request
+BULK_MAX_QUERIES = int(os.getenv('BULK_MAX_QUERIES', '100'))
 
-# Create database tables
+# Create database tables and any indexes missing from an older database
 with app.app_context():
     db.create_all()
+    migrations.upgrade(db)
+
+def conversation_page(user_id, before=None, limit=CONVERSATIONS_PAGE_SIZE):
+    """A page of the user's conversations, newest first, starting after the conversation with id `before`"""
+    query = Conversation.query.filter_by(user_id=user_id)
+    if before is not None:
+        cursor = db.session.get(Conversation, before)
+        if cursor is None or cursor.user_id != user_id:
+            return [], None
+        # Keyset pagination on (created_at, id), served by ix_conversation_user_created
+        query = query.filter(db.or_(
+            Conversation.created_at < cursor.created_at,
+            db.and_(Conversation.created_at == cursor.created_at, Conversation.id < cursor.id)
+        ))
+    rows = query.order_by(Conversation.created_at.desc(), Conversation.id.desc()).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def message_page(conversation, before=None, limit=MESSAGES_PAGE_SIZE):
+    """The latest page of messages before the message with id `before`, in time order"""
+    query = Message.query.filter_by(conversation_id=conversation.id)
+    if before is not None:
+        cursor = db.session.get(Message, before)
+        if cursor is None or cursor.conversation_id != conversation.id:
+            return [], None
+        # Keyset pagination on (timestamp, id), served by ix_message_conversation_timestamp
+        query = query.filter(db.or_(
+            Message.timestamp < cursor.timestamp,
+            db.and_(Message.timestamp == cursor.timestamp, Message.id < cursor.id)
+        ))
+    rows = query.order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return list(reversed(rows[:limit])), next_cursor
+
+# Request timing and structured request log
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    started = getattr(g, 'request_started', None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or 'unknown'
+        metrics.request_seconds.observe(elapsed, endpoint=endpoint, status=response.status_code)
+        metrics.log_json({
+            'method': request.method,
+            'path': request.path,
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 1),
+            'user_id': session.get('user_id')
+        })
+    return response
 
 # Routes
 @app.route('/')
@@ -99,9 +177,9 @@ def chat():
     
     # Get user's conversations
     user_id = session['user_id']
-    conversations = Conversation.query.filter_by(user_id=user_id).order_by(Conversation.created_at.desc()).all()
+    conversations, conversations_cursor = conversation_page(user_id)
     
-    return render_template('chat.html', conversations=conversations)
+    return render_template('chat.html', conversations=conversations, conversations_cursor=conversations_cursor)
 
 @app.route('/new_conversation', methods=['POST'])
 def new_conversation():
@@ -132,44 +210,82 @@ def conversation(conversation_id):
     if not conversation:
         return redirect(url_for('chat'))
     
-    user_conversations = Conversation.query.filter_by(user_id=user_id).order_by(Conversation.created_at.desc()).all()
-    messages = Message.query.filter_by(conversation_id=conversation.id).order_by(Message.timestamp).all()
+    user_conversations, conversations_cursor = conversation_page(user_id)
+    messages, messages_cursor = message_page(conversation)
     
     return render_template('chat.html', 
                           current_conversation=conversation, 
                           conversations=user_conversations, 
-                          messages=messages)
+                          conversations_cursor=conversations_cursor,
+                          messages=messages,
+                          messages_cursor=messages_cursor)
 
-@app.route('/send_message', methods=['POST'])
-def send_message():
+@app.route('/conversations')
+def conversations_json():
+    """Older sidebar conversations; pass ?before=<cursor> from the previous page"""
     if 'user_id' not in session:
         return jsonify({'error': 'Not logged in'}), 401
     
-    data = request.get_json()
-    user_message = data.get('message')
-    conversation_id = data.get('conversation_id')
+    conversations, next_cursor = conversation_page(session['user_id'], request.args.get('before', type=int))
+    return jsonify({
+        'conversations': [{
+            'conversation_id': conv.conversation_id,
+            'title': conv.title,
+            'url': url_for('conversation', conversation_id=conv.conversation_id)
+        } for conv in conversations],
+        'next_cursor': next_cursor
+    })
+
+@app.route('/conversation/<conversation_id>/messages')
+def conversation_messages(conversation_id):
+    """Older messages for infinite scroll; pass ?before=<cursor> from the previous page"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
     
-    # Get the conversation
-    conversation = Conversation.query.filter_by(conversation_id=conversation_id).first()
+    conversation = Conversation.query.filter_by(conversation_id=conversation_id, user_id=session['user_id']).first()
     if not conversation:
         return jsonify({'error': 'Conversation not found'}), 404
     
+    messages, next_cursor = message_page(conversation, request.args.get('before', type=int))
+    return jsonify({
+        'messages': [{
+            'id': message.id,
+            'content': message.content,
+            'is_user': message.is_user,
+            'timestamp': message.timestamp.isoformat() if message.timestamp else None
+        } for message in messages],
+        'next_cursor': next_cursor
+    })
+
+def save_exchange(conversation_pk, user_message, bot_response):
+    """Write the user message and bot reply in one short transaction"""
+    conversation = db.session.get(Conversation, conversation_pk)
+    
     # Update title for a new conversation
     if conversation.title == "New Conversation":
         conversation.title = user_message[:30] + "..." if len(user_message) > 30 else user_message
     
-    # Save user message
-    user_msg = Message(
-        content=user_message,
-        is_user=True,
-        conversation_id=conversation.id
-    )
-    db.session.add(user_msg)
-    
+    # Timestamps are set here so the user message still sorts before the reply
+    now = datetime.utcnow()
+    db.session.add_all([
+        Message(content=user_message, is_user=True, conversation_id=conversation_pk, timestamp=now),
+        Message(content=bot_response, is_user=False, conversation_id=conversation_pk, timestamp=now)
+    ])
+    with metrics.stage('db_commit'):
+        db.session.commit()
+
+def run_chat_job(job, conversation_pk, user_message):
+    """Run the AI pipeline for one message and save the exchange (runs on a job worker)"""
+    # No database session is open while the pipeline runs, so no
+    # transaction is held across the multi-second AI call
     try:
-        # Process user message using the AI processor
-        # This now directly returns the Response Generator agent's output
-        bot_response = process_user_input(user_message)
+        # Process user message using the AI processor, passing each
+        # finished pipeline stage on to the client as it happens
+        bot_response = process_user_input(
+            user_message,
+            on_event=lambda event: job.publish('stage', **event),
+            conversation_id=conversation_pk
+        )
         
         # Convert CrewOutput to string if it's not already a string
         if not isinstance(bot_response, str):
@@ -179,39 +295,111 @@ def send_message():
             else:
                 # Fallback to string representation
                 bot_response = str(bot_response)
-        
-        # Save bot response - now as a string
-        bot_msg = Message(
-            content=bot_response,
-            is_user=False,
-            conversation_id=conversation.id
-        )
-        db.session.add(bot_msg)
-        
-        db.session.commit()
-        
-        return jsonify({
-            'user_message': user_message,
-            'bot_response': bot_response
-        })
+        event = 'done'
     except Exception as e:
-        db.session.rollback()
-        error_message = f"Sorry, I encountered an error while processing your request: {str(e)}"
-        
-        # Save error message as bot response
-        error_msg = Message(
-            content=error_message,
-            is_user=False,
-            conversation_id=conversation.id
-        )
-        db.session.add(error_msg)
-        db.session.commit()
-        
-        return jsonify({
-            'user_message': user_message,
-            'bot_response': error_message
-        })
+        bot_response = f"Sorry, I encountered an error while processing your request: {str(e)}"
+        event = 'error'
+    
+    with app.app_context():
+        try:
+            save_exchange(conversation_pk, user_message, bot_response)
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    job.publish(event, user_message=user_message, bot_response=bot_response)
+
+@app.route('/send_message', methods=['POST'])
+def send_message():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    data = request.get_json()
+    user_message = data.get('message')
+    conversation_id = data.get('conversation_id')
+    
+    # Get the conversation
+    conversation = Conversation.query.filter_by(conversation_id=conversation_id).first()
+    if not conversation:
+        return jsonify({'error': 'Conversation not found'}), 404
+    
+    # Queue the AI pipeline and return straight away; the client follows the job
+    try:
+        job = jobs.queue.submit(run_chat_job, conversation.id, user_message, owner=session['user_id'])
+    except jobs.QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify({
+        'job_id': job.id,
+        'status_url': url_for('job_status', job_id=job.id)
+    }), 202
+
+def run_bulk_job(job, queries):
+    """Price-check many queries at once (runs on a job worker)"""
+    results = compare_products(
+        queries,
+        on_item=lambda index, row: job.publish('item', index=index, **row)
+    )
+    job.publish('done', results=results)
+
+@app.route('/api/compare', methods=['POST'])
+def bulk_compare():
+    """Queue a price comparison for a list of product queries"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    queries = [str(q).strip() for q in data.get('queries') or [] if str(q).strip()]
+    if not queries:
+        return jsonify({'error': 'Send a non-empty "queries" list'}), 400
+    if len(queries) > BULK_MAX_QUERIES:
+        return jsonify({'error': f'At most {BULK_MAX_QUERIES} queries per request'}), 400
+    
+    try:
+        job = jobs.queue.submit(run_bulk_job, queries, owner=session['user_id'])
+    except jobs.QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify({
+        'job_id': job.id,
+        'status_url': url_for('job_status', job_id=job.id)
+    }), 202
+
+def get_user_job(job_id):
+    job = jobs.queue.get(job_id)
+    if job is None or job.owner != session.get('user_id'):
+        return None
+    return job
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Poll a chat job; pass ?after=N to get only events after the first N"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    job = get_user_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    after = request.args.get('after', 0, type=int)
+    return jsonify(job.to_dict(after))
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once the chat pipeline is warm, 503 until then"""
+    # Servers started without __main__ (e.g. waitress-serve app:app) warm up on the first probe
+    warmup.start()
+    return jsonify(warmup.status()), 200 if warmup.ready() else 503
 
 if __name__ == '__main__':
     from waitress import serve
+    # Load the AI stack in the background; /ready reports when it's done
+    warmup.start()
+    # Keep popular products' prices warm in the background
+    refresher.start(app, Message)
     serve(app, host='127.0.0.1', port=5000)
\ No newline at end of file
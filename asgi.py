@@ -0,0 +1,211 @@
+"""ASGI entry point: the Flask app plus a native async chat endpoint.
+
+    uvicorn asgi:application --port 5000
+
+Every existing route is served through WsgiToAsgi. POST /async/send_message
+awaits the whole pipeline on the server's event loop and returns the reply
+in the response, so a waiting chat holds no thread: store lookups run on the
+shared browser loop and only the blocking crew and database steps borrow an
+executor thread.
+
+GET /jobs/<job_id>/events streams a queued job's events as Server-Sent Events.
+It is only served here: under waitress a stream would hold a worker thread for
+the whole job, so the Flask app has clients poll /jobs/<job_id> instead.
+"""
+from http.cookies import SimpleCookie
+from asgiref.wsgi import WsgiToAsgi
+from dotenv import load_dotenv
+import asyncio
+import json
+import time
+import os
+import re
+from app import app, db, Conversation, Message, save_exchange
+from ai_processor import process_user_message_async
+import jobs
+import metrics
+import refresher
+import warmup
+
+# Load environment variables
+load_dotenv()
+
+# Async chats allowed in flight at once, like the job queue's limit
+MAX_ASYNC_CHATS = int(os.getenv("MAX_ASYNC_CHATS", str(jobs.MAX_PENDING_JOBS)))
+
+# Seconds between checks for new job events, and between keep-alive comments
+EVENTS_POLL_INTERVAL = 0.25
+EVENTS_KEEPALIVE = 15
+
+JOB_EVENTS_PATH = re.compile(r"^/jobs/([^/]+)/events$")
+
+flask_application = WsgiToAsgi(app)
+
+
+def session_user_id(scope):
+    """User id from the Flask session cookie, or None"""
+    cookies = SimpleCookie()
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            cookies.load(value.decode("latin-1"))
+    cookie = cookies.get(app.config["SESSION_COOKIE_NAME"])
+    if cookie is None:
+        return None
+    serializer = app.session_interface.get_signing_serializer(app)
+    try:
+        data = serializer.loads(cookie.value, max_age=int(app.permanent_session_lifetime.total_seconds()))
+    except Exception:
+        return None
+    return data.get("user_id")
+
+
+def find_conversation(conversation_id, user_id):
+    """Primary key of a user's conversation, or None"""
+    with app.app_context():
+        conversation = Conversation.query.filter_by(conversation_id=conversation_id, user_id=user_id).first()
+        return conversation.id if conversation else None
+
+
+def save(conversation_pk, user_message, bot_response):
+    with app.app_context():
+        try:
+            save_exchange(conversation_pk, user_message, bot_response)
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_json(send, status, data):
+    """Send a JSON response; returns its status"""
+    body = json.dumps(data).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+    return status
+
+
+async def send_message(scope, receive, send):
+    """Run one chat turn and answer with the reply once it is saved"""
+    # Flask's request hooks don't run here, so time and log the request the same way
+    started = time.perf_counter()
+    user_id = session_user_id(scope)
+    status = 500
+    try:
+        status = await handle_send_message(scope, receive, send, user_id)
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.request_seconds.observe(elapsed, endpoint="async_send_message", status=status)
+        metrics.log_json({
+            "method": scope["method"],
+            "path": scope["path"],
+            "endpoint": "async_send_message",
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 1),
+            "user_id": user_id,
+        })
+
+
+async def handle_send_message(scope, receive, send, user_id):
+    """The /async/send_message handler; returns the response status"""
+    if user_id is None:
+        return await send_json(send, 401, {"error": "Not logged in"})
+    try:
+        data = json.loads(await read_body(receive) or b"{}")
+    except ValueError:
+        return await send_json(send, 400, {"error": "Invalid JSON"})
+    user_message = data.get("message")
+    if not user_message:
+        return await send_json(send, 400, {"error": "Message is required"})
+
+    conversation_pk = await asyncio.to_thread(find_conversation, data.get("conversation_id"), user_id)
+    if conversation_pk is None:
+        return await send_json(send, 404, {"error": "Conversation not found"})
+
+    # Counted with the job queue, so the refresher sees these chats as load too
+    if not jobs.inline_chats.try_start(MAX_ASYNC_CHATS):
+        return await send_json(send, 503, {"error": "Too many requests in progress, please try again shortly"})
+    try:
+        bot_response = await process_user_message_async(user_message, conversation_id=conversation_pk)
+    finally:
+        jobs.inline_chats.finish()
+    try:
+        await asyncio.to_thread(save, conversation_pk, user_message, bot_response)
+    except Exception as e:
+        print(f"Error saving async chat: {e}")
+        return await send_json(send, 500, {"error": "Couldn't save the message, please try again"})
+    return await send_json(send, 200, {"user_message": user_message, "bot_response": bot_response})
+
+
+async def job_events(scope, send, job_id):
+    """Stream a chat job's events as Server-Sent Events, polling the job on the event loop"""
+    user_id = session_user_id(scope)
+    if user_id is None:
+        return await send_json(send, 401, {"error": "Not logged in"})
+    job = jobs.queue.get(job_id)
+    if job is None or job.owner != user_id:
+        return await send_json(send, 404, {"error": "Job not found"})
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+    })
+    index = 0
+    idle = 0.0
+    while True:
+        events = job.events_after(index)
+        for event in events:
+            await send({"type": "http.response.body", "body": f"data: {json.dumps(event)}\n\n".encode(), "more_body": True})
+        index += len(events)
+        if job.done and index >= len(job.events):
+            break
+        idle = 0.0 if events else idle + EVENTS_POLL_INTERVAL
+        if idle >= EVENTS_KEEPALIVE:
+            # Comment line keeps proxies from closing an idle stream
+            await send({"type": "http.response.body", "body": b": keep-alive\n\n", "more_body": True})
+            idle = 0.0
+        await asyncio.sleep(EVENTS_POLL_INTERVAL)
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Load the AI stack in the background; /ready reports when it's done
+            warmup.start()
+            # Keep popular products' prices warm in the background
+            refresher.start(app, Message)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] == "http" and scope["path"] == "/async/send_message" and scope["method"] == "POST":
+        return await send_message(scope, receive, send)
+    if scope["type"] == "http" and scope["method"] == "GET":
+        events_path = JOB_EVENTS_PATH.match(scope["path"])
+        if events_path:
+            return await job_events(scope, send, events_path.group(1))
+    return await flask_application(scope, receive, send)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(application, host="127.0.0.1", port=5000)
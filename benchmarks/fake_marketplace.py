@@ -0,0 +1,102 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from string import Template
+import threading
+import hashlib
+import time
+import os
+import re
+
+# Local stand-in for the Amazon and Flipkart search pages. Serves canned HTML
+# with the query filled in and a deterministic price, after a configurable delay.
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Search paths match the real sites: amazon.in/s?k=... and flipkart.com/search?q=...
+ROUTES = {
+    "/amazon/s": ("amazon_search.html", "k"),
+    "/flipkart/search": ("flipkart_search.html", "q"),
+}
+
+def _load(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return Template(f.read())
+
+def page_values(store, query):
+    """Deterministic product values for a query, so runs are comparable"""
+    digest = hashlib.sha1(f"{store}:{query}".encode()).hexdigest()
+    slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-") or "product"
+    return {
+        "query": query,
+        "name": query.title(),
+        "slug": slug,
+        "asin": "B0" + digest[:8].upper(),
+        "pid": digest[:16].upper(),
+        "price": f"{199 + int(digest[:4], 16) % 1800:,}",
+        "rating": f"{3.5 + int(digest[4:6], 16) % 15 / 10:.1f}",
+    }
+
+
+class FakeMarketplace:
+    """Threaded HTTP server for canned marketplace pages"""
+
+    def __init__(self, latency=0.0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.requests = 0
+        templates = {path: (_load(name), param) for path, (name, param) in ROUTES.items()}
+        marketplace = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                route = templates.get(url.path)
+                if route is None:
+                    self.send_error(404)
+                    return
+                template, param = route
+                query = parse_qs(url.query).get(param, [""])[0]
+                marketplace.requests += 1
+                if marketplace.latency:
+                    time.sleep(marketplace.latency)
+                store = url.path.split("/")[1]
+                body = template.substitute(page_values(store, query)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def store_url(self, store):
+        """Base URL to use in place of a real store's site"""
+        return f"{self.base_url}/{store}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    marketplace = FakeMarketplace(port=8765).start()
+    print(f"Fake marketplace on {marketplace.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        marketplace.stop()
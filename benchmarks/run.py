@@ -0,0 +1,183 @@
+"""Offline throughput benchmark for the chat pipeline.
+
+Runs against a local fake marketplace and a scripted LLM, so no API keys or
+network are needed:
+
+    python -m benchmarks.run --mode pipeline --concurrency 1,4,16 --requests 40
+    python -m benchmarks.run --mode http --llm-latency 0.5 --page-latency 0.2
+
+--mode http drives the Flask app the way waitress serves it (threads and the
+job queue); --mode asgi drives asgi.application's async endpoint on one loop.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import itertools
+import math
+import tempfile
+import threading
+import time
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_marketplace import FakeMarketplace
+from benchmarks import stubs
+
+QUERIES = [
+    "Wild Stone Edge EDP Premium Perfume for Men, 100 Ml",
+    "Philips BT3211 beard trimmer",
+    "Head & Shoulders anti dandruff shampoo 650ml",
+    "boAt Airdopes 141 earbuds under 1500",
+    "Fortune sunflower oil 5 L",
+    "Colgate Strong Teeth toothpaste pack of 4",
+    "Nivea men face wash 100 ml",
+    "Parle-G biscuits 2 kg",
+]
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+_request_ids = itertools.count()
+
+def query_for(i, unique):
+    query = QUERIES[i % len(QUERIES)]
+    # Unique suffixes defeat the product cache so every request does full work
+    return f"{query} v{next(_request_ids)}" if unique else query
+
+def pipeline_call():
+    import ai_processor
+    return lambda query: ai_processor.process_user_input(query)
+
+def http_call():
+    import app as web
+    sessions = threading.local()
+
+    def conversation():
+        # One logged-in client and conversation per benchmark thread, so
+        # signup's password hashing stays out of the measured requests
+        if not hasattr(sessions, 'client'):
+            client = web.app.test_client()
+            client.post('/signup', data={'email': f'bench-{threading.get_ident()}-{time.time_ns()}@example.com', 'name': 'Bench', 'password': 'bench'})
+            sessions.client = client
+            sessions.conversation_id = client.post('/new_conversation').headers['Location'].rsplit('/', 1)[1]
+        return sessions.client, sessions.conversation_id
+
+    def call(query):
+        client, conversation_id = conversation()
+        job = client.post('/send_message', json={'message': query, 'conversation_id': conversation_id}).get_json()
+        after = 0
+        while True:
+            status = client.get(f"{job['status_url']}?after={after}").get_json()
+            after = status['next']
+            if status['status'] in ('done', 'error'):
+                return status
+            time.sleep(0.01)
+
+    return call
+
+def asgi_call():
+    import asyncio
+    import httpx
+    import asgi
+    # One event loop serves every benchmark client, as under an ASGI server
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="bench-asgi", daemon=True).start()
+    sessions = threading.local()
+
+    async def conversation():
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi.application), base_url="http://bench")
+        await client.post('/signup', data={'email': f'bench-{threading.get_ident()}-{time.time_ns()}@example.com', 'name': 'Bench', 'password': 'bench'})
+        response = await client.post('/new_conversation')
+        return client, response.headers['Location'].rsplit('/', 1)[1]
+
+    def call(query):
+        if not hasattr(sessions, 'client'):
+            sessions.client, sessions.conversation_id = asyncio.run_coroutine_threadsafe(conversation(), loop).result()
+        response = asyncio.run_coroutine_threadsafe(
+            sessions.client.post('/async/send_message', json={'message': query, 'conversation_id': sessions.conversation_id}, timeout=None),
+            loop
+        ).result()
+        response.raise_for_status()
+        return response.json()
+
+    return call
+
+def run_level(call, concurrency, requests, unique):
+    """Run requests at one concurrency level and return latency stats"""
+    latencies = []
+    errors = 0
+
+    def one(i):
+        started = time.perf_counter()
+        call(query_for(i, unique))
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(one, i) for i in range(requests)]:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                errors += 1
+                print(f"Request failed: {e}")
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("pipeline", "http", "asgi"), default="pipeline")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=40, help="requests per concurrency level")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per scripted LLM call")
+    parser.add_argument("--page-latency", type=float, default=0.1, help="seconds per fake marketplace page")
+    parser.add_argument("--browser-steps", type=int, default=3, help="scripted LLM steps per browser agent")
+    parser.add_argument("--cache", action="store_true", help="repeat queries so the product cache can hit")
+    parser.add_argument("--store-rate", type=float, help="lookups per second allowed per store (default: the adapters' own limits)")
+    parser.add_argument("--browser-agents", action="store_true", help="skip direct scraping and use the (fake) browser agents")
+    args = parser.parse_args(argv)
+
+    # Keep the benchmark's chats and prices out of the real databases
+    os.environ.setdefault("PRICE_HISTORY_DB", os.path.join(tempfile.mkdtemp(), "bench_prices.db"))
+    if args.mode in ("http", "asgi"):
+        os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+    marketplace = FakeMarketplace(latency=args.page_latency).start()
+    stubs.install(marketplace, args.llm_latency, args.browser_steps)
+
+    import metrics
+    import scrapers
+    metrics.log_json = lambda record: None
+    scrapers.DIRECT_SCRAPE = not args.browser_agents
+    if args.store_rate:
+        import marketplaces
+        import resilience
+        for store in marketplaces.adapters():
+            marketplaces.get_adapter(store).rate_limiter = resilience.TokenBucket(args.store_rate, args.store_rate)
+
+    call = {"pipeline": pipeline_call, "http": http_call, "asgi": asgi_call}[args.mode]()
+    print(f"mode={args.mode} llm_latency={args.llm_latency}s page_latency={args.page_latency}s "
+          f"browser_steps={args.browser_steps} cache={'on' if args.cache else 'off'} "
+          f"lookups={'browser agents' if args.browser_agents else 'direct scrape'}")
+    print(f"{'conc':>5} {'reqs':>5} {'errs':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>7}")
+    for level in [int(c) for c in args.concurrency.split(",")]:
+        stats = run_level(call, level, args.requests, unique=not args.cache)
+        print(f"{stats['concurrency']:>5} {stats['requests']:>5} {stats['errors']:>5} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['rps']:>7.2f}")
+    marketplace.stop()
+
+if __name__ == "__main__":
+    main()
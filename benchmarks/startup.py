@@ -0,0 +1,66 @@
+"""Startup-time benchmark: how long importing the web app takes.
+
+Imports each module in a fresh interpreter under `python -X importtime` and
+reports wall time, the slowest imports, and whether any of the heavy AI and
+browser libraries were loaded at import time (they should only load on first
+use or in warmup.py):
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --modules app,asgi,ai_processor --runs 5 --top 15
+"""
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from warmup import HEAVY_MODULES
+
+def import_times(module):
+    """Run one import in a fresh interpreter; returns (wall seconds, {package: (self us, cumulative us)})"""
+    # Importing app creates its tables, so keep that out of the real database
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "startup.db"))
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return elapsed, times
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default="app", help="comma-separated modules to import")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args(argv)
+
+    for module in args.modules.split(","):
+        walls = []
+        for _ in range(args.runs):
+            wall, times = import_times(module)
+            walls.append(wall)
+        heavy = [name for name in HEAVY_MODULES if name in times]
+        print(f"import {module}: median {statistics.median(walls) * 1000:.0f} ms wall over {args.runs} runs, "
+              f"{times.get(module, (0, 0))[1] / 1000:.0f} ms in imports")
+        print(f"  heavy libraries loaded at import: {', '.join(heavy) if heavy else 'none'}")
+        print(f"  {'cumulative ms':>13} {'self ms':>8}  package")
+        for name, (own, cumulative) in sorted(times.items(), key=lambda item: -item[1][1])[:args.top]:
+            print(f"  {cumulative / 1000:>13.1f} {own / 1000:>8.1f}  {name.strip()}")
+
+if __name__ == "__main__":
+    main()
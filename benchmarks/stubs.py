@@ -0,0 +1,155 @@
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from urllib.parse import quote_plus
+import urllib.request
+import asyncio
+import json
+import time
+import re
+
+# Deterministic stand-ins for Groq, Gemini and the browser agents, so the chat
+# pipeline can be driven offline. install() patches them into the app modules.
+
+# Patterns for pulling the first result out of the canned search pages
+RESULT_PATTERNS = {
+    "amazon": {
+        "path": "/s?k=",
+        "product_name": r'<span class="a-size-medium a-color-base a-text-normal">(.*?)</span>',
+        "price": r'<span class="a-offscreen">(.*?)</span>',
+        "rating": r'<span class="a-icon-alt">([\d.]+) out of 5',
+        "purchase_url": r'href="(/[^"]+/dp/[^"]+)"',
+    },
+    "flipkart": {
+        "path": "/search?q=",
+        "product_name": r'<a class="wjcEIp" title="(.*?)"',
+        "price": r'<div class="Nx9bqj">(.*?)</div>',
+        "rating": r'<div class="XQDdHH">(.*?)</div>',
+        "purchase_url": r'<a class="wjcEIp" title=".*?" href="(.*?)"',
+    },
+}
+
+
+class ScriptedLLM:
+    """LLM stand-in that waits a fixed latency and returns scripted text"""
+
+    def __init__(self, latency=0.0, tokens_per_call=500):
+        self.latency = latency
+        self.tokens_per_call = tokens_per_call
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        return SimpleNamespace(content="ok")
+
+    async def ainvoke(self, prompt, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(content="ok")
+
+
+class ScriptedCrewOutput:
+    """Looks enough like a CrewOutput for the pipeline and metrics"""
+
+    def __init__(self, raw, tokens=0):
+        self.raw = raw
+        self.token_usage = SimpleNamespace(successful_requests=1, total_tokens=tokens)
+
+    def __str__(self):
+        return self.raw
+
+
+class FakeHistory:
+    """Looks enough like a browser-use AgentHistoryList"""
+
+    def __init__(self, result, steps, tokens):
+        self._result = result
+        self._steps = steps
+        self._tokens = tokens
+
+    def final_result(self):
+        return self._result
+
+    def number_of_steps(self):
+        return self._steps
+
+    def total_input_tokens(self):
+        return self._tokens
+
+
+def product_query(task):
+    """Recover the searched product from a browser agent task prompt"""
+    line = re.search(r"Product: (.*)", task)
+    text = line.group(1) if line else task
+    product = re.search(r"""["']product["']: ["'](.*?)["']""", text)
+    return product.group(1) if product else text.strip()
+
+
+def make_browser_agent(marketplace, steps=3):
+    """Browser agent class that 'browses' the fake marketplace with a scripted LLM"""
+
+    class FakeBrowserAgent:
+        def __init__(self, task, llm, browser_context=None, initial_actions=None, **kwargs):
+            self.task = task
+            self.llm = llm
+            # The store is named in the task, e.g. "Find product information on Amazon"
+            store = re.search(r"Find product information on (\w+)", task).group(1).lower()
+            self.patterns = RESULT_PATTERNS[store]
+            self.base_url = marketplace.store_url(store)
+
+        def _fetch(self, url):
+            with urllib.request.urlopen(url, timeout=30) as response:
+                return response.read().decode("utf-8")
+
+        async def run(self):
+            # One scripted LLM call per agent step, then read the result page
+            for _ in range(steps):
+                await self.llm.ainvoke(self.task)
+            html = await asyncio.to_thread(self._fetch, self.base_url + self.patterns["path"] + quote_plus(product_query(self.task)))
+            result = {}
+            for field in ("product_name", "price", "rating", "purchase_url"):
+                match = re.search(self.patterns[field], html, re.S)
+                result[field] = match.group(1).strip() if match else "N/A"
+            result["purchase_url"] = self.base_url + result["purchase_url"]
+            return FakeHistory(json.dumps(result), steps, steps * self.llm.tokens_per_call)
+
+    return FakeBrowserAgent
+
+
+@asynccontextmanager
+async def fake_lease():
+    """No real browser is needed by the fake agents"""
+    yield None
+
+
+def install(marketplace, llm_latency=0.2, browser_steps=3):
+    """Patch the pipeline modules to use the stand-ins; returns the shared scripted LLM"""
+    import ai_processor
+    import marketplaces
+    import browser_pool
+    import llm_clients
+    from response_renderer import render_response
+
+    llm = ScriptedLLM(llm_latency)
+
+    def extract_with_crew(user_input, _llm):
+        llm.invoke(user_input)
+        return ScriptedCrewOutput(json.dumps({"product": user_input}), llm.tokens_per_call)
+
+    def generate_with_crew(user_input, product_details, store_details, _llm):
+        llm.invoke(user_input)
+        text = render_response(user_input, product_details, store_details)
+        return ScriptedCrewOutput(text, llm.tokens_per_call)
+
+    # The scripted LLM stands in for Groq, so the crew steps run without a key
+    llm_clients.has_groq_key = lambda: True
+    llm_clients.groq_llm = lambda: llm
+    llm_clients.gemini_llm = lambda: llm
+    ai_processor.extract_product_details_with_crew = extract_with_crew
+    ai_processor.generate_response_with_crew = generate_with_crew
+    browser_pool.lease = fake_lease
+    marketplaces.Agent = make_browser_agent(marketplace, browser_steps)
+    for store in marketplaces.adapters():
+        # Direct scrapes read the fake pages too; the fake agents are their fallback
+        marketplaces.get_adapter(store).base_url = marketplace.store_url(store)
+    return llm
@@ -0,0 +1,153 @@
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+import asyncio
+import threading
+import os
+
+# Load environment variables
+load_dotenv()
+
+# Pool settings. CHROME_PATH is optional; without it the Playwright Chromium build is used.
+CHROME_PATH = os.getenv("CHROME_PATH") or None
+HEADLESS = os.getenv("BROWSER_HEADLESS", "1") != "0"
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+MAX_USES = int(os.getenv("BROWSER_MAX_USES", "25"))
+
+# All browsers live on one long-lived event loop running in a background thread.
+# Playwright objects are bound to the loop that created them, so every browser
+# task has to be scheduled onto this loop rather than a fresh asyncio.run().
+_loop = None
+_loop_lock = threading.Lock()
+
+def get_loop():
+    """Return the shared browser event loop, starting it on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="browser-loop", daemon=True)
+            thread.start()
+        return _loop
+
+def submit(coro):
+    """Schedule a coroutine on the shared browser loop, returning a concurrent future"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+def run(coro, timeout=None):
+    """Run a coroutine on the shared browser loop and wait for its result"""
+    return submit(coro).result(timeout)
+
+
+class PooledBrowser:
+    """A warm browser instance with its usage count"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.uses = 0
+        self.failed = False
+
+
+class BrowserPool:
+    """Fixed-size pool of warm browsers handing out isolated contexts"""
+
+    def __init__(self, size=POOL_SIZE, max_uses=MAX_USES, chrome_path=CHROME_PATH, headless=HEADLESS):
+        self.size = size
+        self.max_uses = max_uses
+        self.chrome_path = chrome_path
+        self.headless = headless
+        self._idle = asyncio.Queue()
+        self._slots = asyncio.Semaphore(size)
+        self._closed = False
+
+    def _new_browser(self):
+        # Imported here so browser_use only loads once a browser is needed
+        from browser_use import Browser, BrowserConfig
+        return PooledBrowser(Browser(
+            config=BrowserConfig(
+                headless=self.headless,
+                chrome_instance_path=self.chrome_path,
+            )
+        ))
+
+    async def is_healthy(self, pooled):
+        """Check the browser is still connected and under its use limit"""
+        if pooled.failed or pooled.uses >= self.max_uses:
+            return False
+        try:
+            playwright_browser = await pooled.browser.get_playwright_browser()
+            return playwright_browser.is_connected()
+        except Exception as e:
+            print(f"Browser health check failed: {e}")
+            return False
+
+    async def _discard(self, pooled):
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            print(f"Error closing browser: {e}")
+
+    async def acquire(self):
+        """Lease a healthy browser, recycling worn out or crashed ones"""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        await self._slots.acquire()
+        try:
+            while not self._idle.empty():
+                pooled = self._idle.get_nowait()
+                if await self.is_healthy(pooled):
+                    return pooled
+                await self._discard(pooled)
+            return self._new_browser()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, pooled):
+        """Return a leased browser to the pool"""
+        pooled.uses += 1
+        if self._closed or pooled.failed or pooled.uses >= self.max_uses:
+            await self._discard(pooled)
+        else:
+            self._idle.put_nowait(pooled)
+        self._slots.release()
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease a browser and yield a fresh isolated context on it"""
+        pooled = await self.acquire()
+        context = None
+        try:
+            context = await pooled.browser.new_context()
+            yield context
+        except Exception:
+            # Assume the browser is in a bad state and recycle it
+            pooled.failed = True
+            raise
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    print(f"Error closing browser context: {e}")
+                    pooled.failed = True
+            await self.release(pooled)
+
+    async def close(self):
+        """Close every idle browser; leased ones are closed on release"""
+        self._closed = True
+        while not self._idle.empty():
+            await self._discard(self._idle.get_nowait())
+
+
+_pool = None
+
+def get_pool():
+    """Return the process-wide browser pool"""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+    return _pool
+
+def lease():
+    """Lease a browser context from the shared pool (use on the shared loop)"""
+    return get_pool().lease()
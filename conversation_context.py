@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from dotenv import load_dotenv
+import threading
+import time
+import os
+import re
+import marketplaces
+from product_parser import parse_product, PRICE_PATTERN, QUANTITY_PATTERN, PACK_PATTERN
+
+# Load environment variables
+load_dotenv()
+
+# What each conversation last searched for: the extracted product and every
+# store's result, kept in memory with LRU eviction across conversations.
+# Follow-ups like "what about the 50ml one?", "which one is cheaper?" or
+# "check amazon again" are answered from it, re-querying only the variant or
+# store that changed instead of running the whole pipeline again.
+
+MAX_CONVERSATIONS = int(os.getenv("CONTEXT_MAX_CONVERSATIONS", "5000"))
+# Follow-ups after this many seconds start a fresh search; prices go stale
+CONTEXT_TTL = float(os.getenv("CONTEXT_TTL", "1800"))
+CONVERSATION_CONTEXT = os.getenv("CONVERSATION_CONTEXT", "1") == "1"
+
+# Questions about the results already shown
+COMPARE_PATTERN = re.compile(
+    r"\b(?:cheaper|cheapest|lower|lowest|less expensive|better (?:deal|price)|best (?:deal|price)|compare)\b",
+    re.IGNORECASE
+)
+REFRESH_PATTERN = re.compile(r"\b(?:again|latest|now|refresh|recheck|update[d]?)\b", re.IGNORECASE)
+
+# Words that refer back to the last product rather than naming a new one
+REFERENCE_WORDS = {
+    "what", "about", "how", "and", "also", "then", "the", "a", "an", "one", "ones", "it", "its",
+    "that", "this", "them", "those", "these", "same", "instead", "version", "variant", "size",
+    "option", "in", "on", "at", "from", "for", "of", "please", "show", "me", "check", "only",
+    "any", "is", "there", "which", "where", "should", "i", "buy", "get", "price", "prices",
+    "deal", "deals", "store", "site", "cost", "costs", "with", "bigger", "smaller", "pack",
+    "cheaper", "cheapest", "lower", "lowest", "less", "expensive", "better", "best", "compare",
+    "again", "latest", "now", "refresh", "recheck", "update", "updated", "can", "you", "do",
+    "does", "have", "has", "available", "rs", "inr", "under", "below", "within", "upto", "up", "to",
+}
+
+
+@dataclass(slots=True)
+class FollowUp:
+    """A follow-up to the last search: what to look up again and what to reuse"""
+
+    intent: str  # "compare", "store", "variant" or "recap"
+    product: dict
+    stores: list = field(default_factory=list)  # stores to query again
+    known: dict = field(default_factory=dict)  # store results still valid
+    order: list = field(default_factory=list)  # stores in the reply, in order
+    refresh: bool = False
+
+
+class ConversationContexts:
+    """LRU map of conversation id -> last product and store results"""
+
+    def __init__(self, max_entries=MAX_CONVERSATIONS, ttl=CONTEXT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id):
+        """(product, store results) for a conversation, or None"""
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.time():
+                del self._entries[conversation_id]
+                return None
+            self._entries.move_to_end(conversation_id)
+            return entry["product"], dict(entry["stores"])
+
+    def remember(self, conversation_id, product, stores):
+        """Save a turn's results; results for the same product are merged"""
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is not None and entry["product"] == product:
+                stores = {**entry["stores"], **stores}
+            self._entries[conversation_id] = {
+                "product": product,
+                "stores": stores,
+                "expires_at": time.time() + self.ttl,
+            }
+            self._entries.move_to_end(conversation_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, conversation_id):
+        with self._lock:
+            self._entries.pop(conversation_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def mentioned_stores(user_input):
+    """Registered stores named in a message, in registration order"""
+    text = user_input.lower()
+    return [
+        store for store in marketplaces.adapters()
+        if re.search(rf"\b(?:{re.escape(store)}|{re.escape(marketplaces.get_adapter(store).label.lower())})\b", text)
+    ]
+
+def is_reference(user_input, stores):
+    """Whether a message only refers back to the last product, apart from any new quantity or price"""
+    rest = PACK_PATTERN.sub(" ", QUANTITY_PATTERN.sub(" ", PRICE_PATTERN.sub(" ", user_input)))
+    words = re.findall(r"[a-z0-9]+", rest.lower())
+    return all(word in REFERENCE_WORDS or word in stores for word in words)
+
+def follow_up(user_input, context):
+    """The FollowUp a message asks for, given a conversation's context, or None for a new search"""
+    if context is None:
+        return None
+    product, results = context
+    if not isinstance(product, dict) or not product.get("product") or not results:
+        return None
+    stores = mentioned_stores(user_input)
+    if not is_reference(user_input, stores):
+        return None
+    order = list(results)
+
+    # A new quantity, pack size or budget: the same product in a different variant
+    details, _ = parse_product(user_input)
+    changes = {key: details[key] for key in ("quantity", "price_max") if key in details}
+    if changes:
+        variant = {**product, **changes}
+        targets = stores or order
+        return FollowUp("variant", variant, stores=targets, order=targets)
+    if COMPARE_PATTERN.search(user_input):
+        return FollowUp("compare", product, known=results, order=stores or order)
+    if stores:
+        known = {store: result for store, result in results.items() if store not in stores}
+        order = order + [store for store in stores if store not in order]
+        return FollowUp("store", product, stores=stores, known=known, order=order,
+                        refresh=bool(REFRESH_PATTERN.search(user_input)))
+    # "What about it?": show the last results again
+    return FollowUp("recap", product, known=results, order=order)
+
+
+contexts = ConversationContexts()
@@ -0,0 +1,65 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from dotenv import load_dotenv
+import sqlite3
+import os
+
+# Load environment variables
+load_dotenv()
+
+# Persistence settings for the Flask-SQLAlchemy engine. SQLite is tuned for
+# several waitress threads and job workers writing at once; set DATABASE_URL
+# to a postgresql:// URI to share one database between several app servers.
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///chatbot.db")
+# How long a SQLite writer waits for the lock before "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Page cache per connection in KiB
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "20000"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+def database_uri(url=DATABASE_URL):
+    """Normalize a database URL for SQLAlchemy"""
+    # Heroku-style postgres:// URLs are not accepted by SQLAlchemy 1.4+
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+def engine_options(uri):
+    """Connection pool settings for the database backend"""
+    if uri.startswith("sqlite"):
+        return {
+            "connect_args": {
+                "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+                "check_same_thread": False,
+            },
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+        }
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+
+def configure_database(app):
+    """Set the database URI and engine options on a Flask app"""
+    uri = database_uri()
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection: WAL lets readers and one writer work at once"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # NORMAL is durable with WAL except for the last commits on power loss
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
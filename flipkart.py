@@ -1,53 +1,57 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from browser_use import Agent
-from browser_use import Agent, Browser, BrowserConfig
 from dotenv import load_dotenv
-import asyncio
 import os
+import browser_pool
+import marketplaces
+import scrapers
 
 
 load_dotenv()
 
-api_key = os.getenv("GOOGLE_API_KEY")  
-
-browser = Browser(
-    config=BrowserConfig(
-       
-        chrome_instance_path='C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe',  
-     
-    )
-)
-initial_actions = [
-	{'open_tab': {'url': 'https://www.flipkart.com/'}}
-]
-async def flipkart(product_details):
-    
-    llm = ChatGoogleGenerativeAI(model='gemini-2.0-flash', api_key=api_key)
-    
-    agent = Agent(
-        task=f"""
-    
-        Find product information on flipkart:
-        - Product: {product_details}
-
-         - Required details:
-             1. Full product name (exact as shown on Amazon)
-             2. Current minimum price
-             3. Average rating
-            4. Direct purchase URL
-        - Format response as structured JSON data with these keys: "product_name", "price", "rating", "purchase_url"
-        - If multiple sellers exist, return the lowest price option from a reputable seller
-        -if particular product is not available on flipkart, then return a message "Product not available on flipkart"
-        - Note: Return only factual information as displayed on the Amazon product page""",
-        llm=llm,
-        browser=browser,
-        initial_actions=initial_actions
-    )
-    result = await agent.run()
-    return result.final_result()
 
+class FlipkartAdapter(marketplaces.MarketplaceAdapter):
+    name = "flipkart"
+    label = "Flipkart"
+    emoji = "🔵"
+    base_url = os.getenv("FLIPKART_BASE_URL", "https://www.flipkart.com")
+    search_path = "/search"
+    search_param = "q"
+
+    def parse_search_results(self, html):
+        """Results from a Flipkart search page (grid and list layouts)"""
+        page = scrapers.soup(html)
+        results = []
+        for card in page.select("div[data-id]"):
+            name = card.select_one("a.wjcEIp[title], a.WKTcLC[title]")
+            link = card.select_one("a.CGtC98[href], a.wjcEIp[href], a.WKTcLC[href], a.VJA3rP[href]")
+            if link is None:
+                continue
+            results.append({
+                "product_name": name["title"] if name else scrapers.text_of(card.select_one("div.KzDlHZ")),
+                "price": scrapers.text_of(card.select_one("div.Nx9bqj")),
+                "rating": scrapers.text_of(card.select_one("div.XQDdHH")) or "N/A",
+                "purchase_url": scrapers.absolute_url(self.base_url, link["href"]),
+            })
+        return results
+
+    def parse_product_page(self, html, url):
+        """Product details from a Flipkart product page"""
+        page = scrapers.soup(html)
+        title = page.select_one("span.VU-ZEz, h1")
+        if title is None:
+            return None
+        return {
+            "product_name": scrapers.text_of(title),
+            "price": scrapers.text_of(page.select_one("div.Nx9bqj.CxhGGd, div.Nx9bqj")),
+            "rating": scrapers.text_of(page.select_one("div.XQDdHH")) or "N/A",
+            "purchase_url": url,
+        }
+
+
+adapter = marketplaces.register(FlipkartAdapter())
 
-def get_flipkart_output(input):
-    return asyncio.run(flipkart(input))
+async def flipkart(product_details):
+    return await adapter.lookup(product_details)
 
 
+def get_flipkart_output(input):
+    return browser_pool.run(flipkart(input))
@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import threading
+import time
+import uuid
+import os
+import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Chat pipelines run on this many background threads, independent of the web server's threads
+CHAT_WORKERS = int(os.getenv("CHAT_WORKERS", "4"))
+# New jobs are refused once this many are queued or running
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", "100"))
+# Finished jobs are kept this many seconds for clients to collect results
+JOB_TTL = float(os.getenv("JOB_TTL", "600"))
+
+FINAL_EVENTS = ("done", "error")
+
+
+class QueueFullError(Exception):
+    """Raised when too many chat jobs are already pending"""
+
+
+class Job:
+    """A queued chat pipeline run and the events it has published"""
+
+    def __init__(self, owner=None):
+        self.id = str(uuid.uuid4())
+        self.owner = owner
+        self.status = "queued"
+        self.events = []
+        self.finished_at = None
+        self._changed = threading.Condition()
+
+    def publish(self, event_type, **data):
+        """Append an event for clients and wake up anyone waiting on it"""
+        with self._changed:
+            self.events.append(dict(data, type=event_type))
+            if event_type in FINAL_EVENTS:
+                self.status = event_type
+                self.finished_at = time.time()
+            self._changed.notify_all()
+
+    def events_after(self, index, timeout=None):
+        """Events from index onwards, waiting up to timeout for new ones"""
+        with self._changed:
+            if timeout and len(self.events) <= index and not self.done:
+                self._changed.wait(timeout)
+            return self.events[index:]
+
+    @property
+    def done(self):
+        return self.status in FINAL_EVENTS
+
+    def to_dict(self, after=0):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "events": self.events[after:],
+            "next": len(self.events),
+        }
+
+
+class JobQueue:
+    """Bounded worker pool running chat jobs in the background"""
+
+    def __init__(self, workers=CHAT_WORKERS, max_pending=MAX_PENDING_JOBS):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def pending(self):
+        """Number of jobs queued or running"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def submit(self, fn, *args, owner=None):
+        """Queue fn(job, *args) and return the job right away"""
+        self.purge()
+        job = Job(owner)
+        with self._lock:
+            if sum(1 for j in self._jobs.values() if not j.done) >= self.max_pending:
+                raise QueueFullError("Too many requests in progress, please try again shortly")
+            self._jobs[job.id] = job
+        job.publish("queued")
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        job.status = "running"
+        try:
+            fn(job, *args)
+        except Exception as e:
+            print(f"Error in chat job {job.id}: {e}")
+            if not job.done:
+                job.publish("error", message=str(e))
+        if not job.done:
+            job.publish("error", message="Job finished without a result")
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def purge(self):
+        """Forget finished jobs older than JOB_TTL"""
+        cutoff = time.time() - JOB_TTL
+        with self._lock:
+            for job_id in [i for i, job in self._jobs.items() if job.done and job.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+
+class InlineChats:
+    """Count of chats run outside the queue, like the ASGI endpoint's awaited turns"""
+
+    def __init__(self):
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def try_start(self, limit):
+        """Claim a slot, or return False if limit chats are already running"""
+        with self._lock:
+            if self._running >= limit:
+                return False
+            self._running += 1
+            return True
+
+    def finish(self):
+        with self._lock:
+            self._running -= 1
+
+    def running(self):
+        with self._lock:
+            return self._running
+
+
+# Process-wide queue used by app.py, and the chats asgi.py runs inline
+queue = JobQueue()
+inline_chats = InlineChats()
+
+def load():
+    """Chats queued or running, through the queue or inline"""
+    return queue.pending() + inline_chats.running()
+
+metrics.gauge("chat_jobs_pending", "Chat jobs queued or running", queue.pending)
+metrics.gauge("chat_inline_running", "Chats running outside the job queue", inline_chats.running)
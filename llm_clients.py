@@ -0,0 +1,105 @@
+from dotenv import load_dotenv
+import threading
+import httpx
+import os
+
+# Load environment variables
+load_dotenv()
+
+# Process-wide LLM clients. They are built lazily on first use and then
+# shared by every request, so each chat turn reuses warm HTTP connections
+# instead of opening new ones. The LLM libraries are imported the same way,
+# on first use, since they take seconds to load. CrewAI agents are not
+# shared: a crew run mutates its agents, so each request builds its own from
+# the static definitions below, which is cheap.
+
+# The Groq model only runs the optional CrewAI steps: extraction the local
+# parser can't handle, and reply polishing when POLISH_RESPONSES is on. It
+# reads GROQ_API_KEY from the environment; without it those steps fail and
+# every other turn is unaffected.
+GROQ_MODEL = "groq/llama3-8b-8192"
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Keep-alive pool shared by the Groq clients
+HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+HTTP_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+# CrewAI's step-by-step console logging; set AGENT_VERBOSE=1 when debugging prompts
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "0") == "1"
+
+# Static agent definitions; only the task changes between requests
+AGENT_DEFINITIONS = {
+    "product_parser": {
+        "role": "Product Parser",
+        "goal": "Extract product details from user input",
+        "backstory": """You analyze user queries to identify product names, quantities, and filters.""",
+    },
+    "response_generator": {
+        "role": "Response Generator",
+        "goal": "Create personalized, user-friendly responses",
+        "backstory": """You transform technical product information into friendly,
+        helpful responses that highlight the most relevant information for the user.""",
+    },
+}
+
+# Re-entrant: building the Groq client builds the shared HTTP clients under it
+_lock = threading.RLock()
+_clients = {}
+
+def _shared(name, factory):
+    """Return the named client, building it once under the lock"""
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+def http_client():
+    """Pooled keep-alive HTTP client for synchronous LLM calls"""
+    return _shared("http", lambda: httpx.Client(
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+    ))
+
+def async_http_client():
+    """Pooled keep-alive HTTP client for async LLM calls"""
+    return _shared("async_http", lambda: httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+    ))
+
+def _build_groq():
+    from langchain_groq import ChatGroq
+    return ChatGroq(
+        model_name=GROQ_MODEL,
+        temperature=0.7,
+        http_client=http_client(),
+        http_async_client=async_http_client(),
+    )
+
+def has_groq_key():
+    return bool(os.getenv("GROQ_API_KEY"))
+
+def groq_llm():
+    """Shared Groq chat model used by the CrewAI agents"""
+    return _shared("groq", _build_groq)
+
+def _build_gemini():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=GEMINI_MODEL, api_key=os.getenv("GOOGLE_API_KEY"))
+
+def gemini_llm():
+    """Shared Gemini chat model used by the browser agents"""
+    return _shared("gemini", _build_gemini)
+
+def agent(name, llm):
+    """New CrewAI agent for a definition in AGENT_DEFINITIONS, bound to the shared llm"""
+    from crewai import Agent
+    return Agent(
+        **AGENT_DEFINITIONS[name],
+        verbose=AGENT_VERBOSE,
+        allow_delegation=False,
+        llm=llm
+    )
@@ -0,0 +1,158 @@
+from dotenv import load_dotenv
+import asyncio
+import os
+import browser_pool
+import metrics
+import llm_clients
+import scrapers
+import resilience
+import response_renderer
+from results import ProductResult
+
+# Load environment variables
+load_dotenv()
+
+# browser_use's Agent class, imported on first use by browser_agent_class()
+Agent = None
+
+# Default hard limit in seconds for one store lookup
+STORE_TIMEOUT = float(os.getenv("STORE_TIMEOUT", "90"))
+
+
+class MarketplaceAdapter:
+    """One store the chatbot compares prices on.
+
+    Subclasses set the class attributes and implement parse_search_results
+    (and optionally parse_product_page); everything else is shared. Register
+    an instance with register() to have it queried on every chat turn.
+    """
+
+    name = ""                  # registry key, e.g. "amazon"
+    label = ""                 # display name, e.g. "Amazon"
+    emoji = "🛒"
+    base_url = ""              # e.g. "https://www.amazon.in"
+    search_path = "/search"
+    search_param = "q"
+    timeout = STORE_TIMEOUT    # hard limit for one lookup, in seconds
+    max_concurrent = 4         # lookups allowed in flight at once for this store
+    rate_per_second = 2.0      # sustained lookups per second sent to the store
+    burst = 4                  # lookups allowed back to back before rate limiting
+    failure_rate = 0.5         # breaker opens at this failure rate over the window...
+    failure_window = 10        # ...of this many recent lookups...
+    min_calls = 4              # ...once at least this many have been made
+    reset_timeout = 30.0       # seconds the breaker stays open before a probe
+
+    def __init__(self):
+        # STORE_TIMEOUT_<NAME> overrides the timeout for one store
+        self.timeout = float(os.getenv(f"STORE_TIMEOUT_{self.name.upper()}", self.timeout))
+        self.rate_limiter = resilience.TokenBucket(self.rate_per_second, self.burst)
+        self.breaker = resilience.CircuitBreaker(
+            self.failure_rate, self.failure_window, self.min_calls, self.reset_timeout
+        )
+        self._slots = None
+
+    # Search and parse
+
+    def search_url(self, product_details):
+        return scrapers.search_url(self.base_url, self.search_path, self.search_param, product_details)
+
+    def parse_search_results(self, html):
+        """List of result dicts from a search page"""
+        raise NotImplementedError
+
+    def parse_product_page(self, html, url):
+        """Result dict from a product page, or None"""
+        return None
+
+    def normalize(self, result):
+        """Validate a scraped result into the compact dict the rest of the pipeline uses"""
+        return ProductResult.from_dict(result, self.base_url).to_dict()
+
+    def fallback(self, error="Error retrieving product"):
+        """Result used when the lookup fails"""
+        return ProductResult.not_available(error, self.base_url).to_dict()
+
+    # Lookup paths
+
+    async def scrape(self, product_details):
+        """Read the search page directly; None when the page can't be parsed"""
+        return await scrapers.scrape(
+            product_details,
+            self.search_url(product_details),
+            self.parse_search_results,
+            self.parse_product_page
+        )
+
+    def agent_task(self, product_details):
+        return f"""
+        Find product information on {self.label}:
+        - Product: {product_details}
+
+        - Required details:
+            1. Full product name (exact as shown on {self.label})
+            2. Current minimum price
+            3. Average rating
+            4. Direct purchase URL
+        - Format response as structured JSON data with these keys: "product_name", "price", "rating", "purchase_url"
+        - If multiple sellers exist, return the lowest price option from a reputable seller
+        - if particular product is not available on {self.label}, then return a message "Product not available on {self.label}"
+        - Note: Return only factual information as displayed on the {self.label} product page"""
+
+    async def browse(self, product_details):
+        """Fallback: let a Gemini browser agent find the product"""
+        llm = llm_clients.gemini_llm()
+        async with browser_pool.lease() as browser_context:
+            agent = browser_agent_class()(
+                task=self.agent_task(product_details),
+                llm=llm,
+                browser_context=browser_context,
+                initial_actions=[{'open_tab': {'url': self.base_url + '/'}}]
+            )
+            result = await agent.run()
+            metrics.record_browser_run(self.name, result)
+            return result.final_result()
+
+    async def lookup(self, product_details):
+        """Direct scrape first, browser agent only if that fails"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        async with self._slots:
+            if scrapers.DIRECT_SCRAPE:
+                try:
+                    result = await self.scrape(product_details)
+                    if result:
+                        metrics.direct_scrapes.inc(store=self.name, outcome="hit")
+                        return self.normalize(result)
+                    metrics.direct_scrapes.inc(store=self.name, outcome="no_result")
+                except Exception as e:
+                    metrics.direct_scrapes.inc(store=self.name, outcome="error")
+                    print(f"Direct {self.label} scrape failed, using browser agent: {e}")
+            output = await self.browse(product_details)
+            # An unreadable answer raises, so fetch_store counts it as a failure
+            return ProductResult.from_agent_output(output, self.base_url).to_dict()
+
+
+def browser_agent_class():
+    """browser_use's Agent, imported on first use since browser_use is slow to load"""
+    global Agent
+    if Agent is None:
+        from browser_use import Agent as agent_class
+        Agent = agent_class
+    return Agent
+
+
+# Registered stores, queried in registration order
+_adapters = {}
+
+def register(adapter):
+    """Add a store to every chat turn's comparison"""
+    _adapters[adapter.name] = adapter
+    response_renderer.register_store(adapter.name, adapter.label, adapter.emoji)
+    return adapter
+
+def get_adapter(name):
+    return _adapters[name]
+
+def adapters():
+    """Names of the registered stores"""
+    return list(_adapters)
@@ -0,0 +1,251 @@
+from contextlib import contextmanager
+import contextvars
+import threading
+import json
+import time
+
+# Lightweight in-process metrics: counters, histograms and per-turn traces,
+# exported in Prometheus text format from the /metrics route.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge:
+    """Value read from a callback when metrics are exported"""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def samples(self):
+        try:
+            return [(self.name, (), self.read())]
+        except Exception as e:
+            print(f"Error reading gauge {self.name}: {e}")
+            return []
+
+
+class Histogram:
+    """Cumulative bucket histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def samples(self):
+        result = []
+        with self._lock:
+            for key, series in self._series.items():
+                for bound, count in zip(self.buckets, series["counts"]):
+                    result.append((f"{self.name}_bucket", key + (("le", bound),), count))
+                result.append((f"{self.name}_bucket", key + (("le", "+Inf"),), series["count"]))
+                result.append((f"{self.name}_sum", key, series["sum"]))
+                result.append((f"{self.name}_count", key, series["count"]))
+        return result
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+def _register(metric):
+    with _registry_lock:
+        return _registry.setdefault(metric.name, metric)
+
+def counter(name, help_text):
+    return _register(Counter(name, help_text))
+
+def histogram(name, help_text, buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, help_text, buckets))
+
+def gauge(name, help_text, read):
+    return _register(Gauge(name, help_text, read))
+
+def render_prometheus():
+    """Every registered metric in Prometheus text exposition format"""
+    lines = []
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{_label_text(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# Metrics recorded by the chat pipeline and web routes
+stage_seconds = histogram("chat_stage_seconds", "Time spent in each chat pipeline stage")
+turn_seconds = histogram("chat_turn_seconds", "Total time for one chat turn")
+llm_calls = counter("llm_calls_total", "LLM calls made, by agent")
+llm_tokens = counter("llm_tokens_total", "LLM tokens used, by agent")
+browser_steps = counter("browser_agent_steps_total", "Browser agent steps taken, by store")
+store_fast_fails = counter("store_fast_fails_total", "Store lookups skipped by the breaker or rate limiter, by store and reason")
+direct_scrapes = counter("direct_scrape_total", "Direct store scrapes, by store and outcome")
+follow_ups = counter("chat_follow_ups_total", "Follow-up questions answered from conversation context, by intent")
+request_seconds = histogram("http_request_seconds", "Flask request latency, by endpoint and status")
+prompt_tokens = histogram(
+    "llm_prompt_tokens", "Estimated prompt tokens sent, by agent",
+    buckets=(50, 100, 200, 400, 800, 1600, 3200, 6400)
+)
+prompt_tokens_saved = counter("llm_prompt_tokens_saved_total", "Estimated prompt tokens saved by compacting embedded data, by agent")
+
+
+class Trace:
+    """Per-turn record of stage timings, LLM usage and browser steps"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.llm_calls = 0
+        self.llm_tokens = 0
+        self.browser_steps = {}
+        self.prompt_tokens = 0
+        self.prompt_tokens_saved = 0
+        self._lock = threading.Lock()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "trace": self.name,
+                "duration_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                "stages_ms": {k: round(v * 1000, 1) for k, v in self.stages.items()},
+                "llm_calls": self.llm_calls,
+                "llm_tokens": self.llm_tokens,
+                "browser_steps": dict(self.browser_steps),
+                "prompt_tokens": self.prompt_tokens,
+                "prompt_tokens_saved": self.prompt_tokens_saved,
+            }
+
+
+# The active trace follows the turn onto the browser loop, because
+# run_coroutine_threadsafe copies the caller's context into the task
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+def current_trace():
+    return _current_trace.get()
+
+@contextmanager
+def trace(name):
+    """Trace one chat turn and log it as a JSON line when it ends"""
+    turn = Trace(name)
+    token = _current_trace.set(turn)
+    try:
+        yield turn
+    finally:
+        _current_trace.reset(token)
+        turn_seconds.observe(time.perf_counter() - turn.started)
+        log_json(turn.to_dict())
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage into the histogram and the active trace"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, stage=name)
+        turn = current_trace()
+        if turn is not None:
+            with turn._lock:
+                turn.stages[name] = turn.stages.get(name, 0) + elapsed
+
+def record_llm_usage(agent, calls=1, tokens=0):
+    """Count LLM calls and tokens for an agent"""
+    llm_calls.inc(calls, agent=agent)
+    llm_tokens.inc(tokens, agent=agent)
+    turn = current_trace()
+    if turn is not None:
+        with turn._lock:
+            turn.llm_calls += calls
+            turn.llm_tokens += tokens
+
+def record_prompt(agent, tokens, saved=0):
+    """Record an LLM prompt's estimated size and the tokens saved on it"""
+    prompt_tokens.observe(tokens, agent=agent)
+    prompt_tokens_saved.inc(saved, agent=agent)
+    turn = current_trace()
+    if turn is not None:
+        with turn._lock:
+            turn.prompt_tokens += tokens
+            turn.prompt_tokens_saved += saved
+
+def record_crew_output(agent, crew_output):
+    """Count LLM usage from a CrewAI kickoff result"""
+    usage = getattr(crew_output, "token_usage", None)
+    calls = getattr(usage, "successful_requests", 0) or 1
+    tokens = getattr(usage, "total_tokens", 0) or 0
+    record_llm_usage(agent, calls, tokens)
+
+def record_browser_run(store, history):
+    """Count steps and LLM usage from a browser-use agent history"""
+    try:
+        steps = history.number_of_steps()
+        tokens = history.total_input_tokens()
+    except Exception:
+        return
+    browser_steps.inc(steps, store=store)
+    # Every browser agent step is one Gemini call
+    record_llm_usage(f"browser:{store}", steps, tokens)
+    turn = current_trace()
+    if turn is not None:
+        with turn._lock:
+            turn.browser_steps[store] = turn.browser_steps.get(store, 0) + steps
+
+def log_json(record):
+    """Write one structured log line"""
+    print(json.dumps(record, default=str), flush=True)
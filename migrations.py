@@ -0,0 +1,29 @@
+"""Schema upgrades for existing chatbot databases.
+
+db.create_all() only creates missing tables, so indexes added to models that
+already have a table are never created on an existing instance/chatbot.db.
+upgrade() creates any that are missing; it is safe to run repeatedly.
+
+    python migrations.py
+"""
+from sqlalchemy import inspect
+
+def upgrade(db):
+    """Create every index declared on the models that the database doesn't have yet"""
+    created = []
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+    return created
+
+
+if __name__ == "__main__":
+    from app import app, db
+
+    with app.app_context():
+        created = upgrade(db)
+    print(f"Created indexes: {', '.join(created)}" if created else "Database is up to date")
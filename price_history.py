@@ -0,0 +1,205 @@
+from dotenv import load_dotenv
+import threading
+import sqlite3
+import queue
+import time
+import os
+import metrics
+from product_cache import normalize_query
+from response_renderer import register_deal_note
+from results import parse_price
+
+# Load environment variables
+load_dotenv()
+
+# Price history: every successful store lookup appends (product, store, time,
+# price) to a compact SQLite table. Writes go through a queue to one writer
+# thread that inserts in batches, so the chat path never waits on the disk.
+
+PRICE_HISTORY = os.getenv("PRICE_HISTORY", "1") == "1"
+# Next to the chat database in Flask's instance folder by default
+HISTORY_DB = os.getenv("PRICE_HISTORY_DB") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "instance", "price_history.db"
+)
+# Points waiting to be written; new points are dropped while the queue is full
+MAX_QUEUED = int(os.getenv("PRICE_HISTORY_MAX_QUEUED", "10000"))
+BATCH_SIZE = int(os.getenv("PRICE_HISTORY_BATCH_SIZE", "500"))
+# Seconds the writer waits to fill a batch before writing what it has
+FLUSH_INTERVAL = float(os.getenv("PRICE_HISTORY_FLUSH_INTERVAL", "1"))
+# An unchanged price is recorded again at most this often, in seconds
+MIN_GAP = float(os.getenv("PRICE_HISTORY_MIN_GAP", "3600"))
+
+DAY = 86400
+
+points_written = metrics.counter("price_history_points_total", "Price points written, by outcome")
+
+# Products and stores are stored once and referenced by integer id; prices are
+# integer paise and times integer seconds, in a WITHOUT ROWID table clustered
+# on (product, store, time) so range and aggregate queries read one slice.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS product (
+    id INTEGER PRIMARY KEY,
+    query TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS store (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS price_point (
+    product_id INTEGER NOT NULL,
+    store_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    price INTEGER NOT NULL,
+    PRIMARY KEY (product_id, store_id, ts)
+) WITHOUT ROWID;
+"""
+
+
+class PriceHistory:
+    """Append-only price time series per product and store"""
+
+    def __init__(self, db_path=HISTORY_DB):
+        self.db_path = db_path
+        self._queue = queue.Queue(maxsize=MAX_QUEUED)
+        self._ids = {}
+        # Last (price, ts) written per (product, store), for skipping repeats
+        self._last = {}
+        self._reader = None
+        self._read_lock = threading.Lock()
+        self._writer = None
+        self._start_lock = threading.Lock()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        return db
+
+    # Writing
+
+    def record(self, store, query, price, ts=None):
+        """Queue a price point; never blocks the caller"""
+        if price is None:
+            return
+        with self._start_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="price-history", daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait((query, store, int(ts or time.time()), round(price * 100)))
+        except queue.Full:
+            points_written.inc(outcome="dropped")
+
+    def record_result(self, store, query, result):
+        """Record the price of a store lookup result, if it has one"""
+        if isinstance(result, dict):
+            self.record(store, query, parse_price(result.get("price")))
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(db, batch)
+            except sqlite3.Error as e:
+                points_written.inc(len(batch), outcome="error")
+                print(f"Error writing price history: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _id(self, db, table, column, value):
+        key = (table, value)
+        if key not in self._ids:
+            db.execute(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", (value,))
+            self._ids[key] = db.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,)).fetchone()[0]
+        return self._ids[key]
+
+    def _write(self, db, batch):
+        rows = []
+        for query, store, ts, price in batch:
+            key = (self._id(db, "product", "query", query), self._id(db, "store", "name", store))
+            last = self._last.get(key)
+            if last is not None and last[0] == price and ts - last[1] < MIN_GAP:
+                points_written.inc(outcome="unchanged")
+                continue
+            self._last[key] = (price, ts)
+            rows.append(key + (ts, price))
+        db.executemany("INSERT OR REPLACE INTO price_point (product_id, store_id, ts, price) VALUES (?, ?, ?, ?)", rows)
+        db.commit()
+        points_written.inc(len(rows), outcome="written")
+
+    def flush(self):
+        """Wait until every queued point has been written"""
+        self._queue.join()
+
+    # Reading
+
+    def _read(self, sql, params):
+        with self._read_lock:
+            if self._reader is None:
+                self._reader = self._connect()
+            return self._reader.execute(sql, params).fetchone()
+
+    def stats(self, store, query, days=30):
+        """Lowest, average and number of prices over the last days, or None"""
+        row = self._read(
+            """
+            SELECT MIN(p.price), AVG(p.price), COUNT(*)
+            FROM price_point p
+            JOIN product ON product.id = p.product_id
+            JOIN store ON store.id = p.store_id
+            WHERE product.query = ? AND store.name = ? AND p.ts >= ?
+            """,
+            (query, store, int(time.time() - days * DAY))
+        )
+        if not row or not row[2]:
+            return None
+        return {"min": row[0] / 100, "avg": row[1] / 100, "count": row[2]}
+
+    def lowest_ever(self, store, query):
+        """Lowest price ever recorded and when, as (price, ts), or None"""
+        row = self._read(
+            """
+            SELECT p.price, p.ts
+            FROM price_point p
+            JOIN product ON product.id = p.product_id
+            JOIN store ON store.id = p.store_id
+            WHERE product.query = ? AND store.name = ?
+            ORDER BY p.price, p.ts DESC
+            LIMIT 1
+            """,
+            (query, store)
+        )
+        if not row:
+            return None
+        return row[0] / 100, row[1]
+
+
+# Process-wide history used by the chat pipeline
+history = PriceHistory()
+
+def lowest_price_note(product_details, deal):
+    """Reply note when a store's price is the lowest seen in 30 days"""
+    if not PRICE_HISTORY or deal["price"] is None:
+        return None
+    stats = history.stats(deal["store"], normalize_query(product_details))
+    # Needs earlier prices to compare with, not just this lookup's
+    if stats is None or stats["count"] < 2 or deal["price"] > stats["min"]:
+        return None
+    return "📉 Lowest price in 30 days"
+
+register_deal_note(lowest_price_note)
+
+metrics.gauge("price_history_queued", "Price points waiting to be written", lambda: history._queue.qsize())
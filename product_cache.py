@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from dotenv import load_dotenv
+import threading
+import sqlite3
+import json
+import time
+import os
+import re
+import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Default time-to-live in seconds; prices go stale, so keep this short.
+# Override per store with CACHE_TTL_<STORE>, e.g. CACHE_TTL_AMAZON=900
+DEFAULT_TTL = float(os.getenv("CACHE_TTL", "1800"))
+MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+# Optional SQLite file for a persistent tier shared across restarts and workers
+CACHE_DB = os.getenv("PRODUCT_CACHE_DB") or None
+
+QUERY_FIELDS = ("product", "quantity", "price_max", "other_filters")
+
+def _clean(value):
+    return re.sub(r"\s+", " ", str(value)).strip().lower()
+
+def normalize_query(product_details):
+    """Build a stable cache key from extracted product details"""
+    details = product_details
+    if hasattr(details, "raw"):
+        details = details.raw
+    if isinstance(details, str):
+        try:
+            details = json.loads(details)
+        except ValueError:
+            return _clean(details)
+    if isinstance(details, dict):
+        return "|".join(_clean(details.get(field) or "") for field in QUERY_FIELDS)
+    return _clean(details)
+
+def store_ttl(store):
+    """Time-to-live for a store's cached results"""
+    return float(os.getenv(f"CACHE_TTL_{store.upper()}", DEFAULT_TTL))
+
+
+class ProductCache:
+    """Two-tier (memory LRU + optional SQLite) cache of store lookup results"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, db_path=CACHE_DB):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS product_cache (
+                    store TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (store, query)
+                )
+            """)
+            self._db.commit()
+
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, store, query):
+        """Return a fresh cached result or None"""
+        key = (store, query)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM product_cache WHERE store = ? AND query = ?",
+                    key
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def get_stale(self, store, query):
+        """Return a cached result even if it has expired, or None; not counted as a hit"""
+        key = (store, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM product_cache WHERE store = ? AND query = ?",
+                    key
+                ).fetchone()
+                if row is not None:
+                    return json.loads(row[0])
+            return None
+
+    def expires_in(self, store, query):
+        """Seconds until a cached result expires; 0 if missing or already expired"""
+        key = (store, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return max(0.0, entry[1] - time.time())
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at FROM product_cache WHERE store = ? AND query = ?",
+                    key
+                ).fetchone()
+                if row is not None:
+                    return max(0.0, row[0] - time.time())
+            return 0.0
+
+    def set(self, store, query, value, ttl=None):
+        """Cache a store result for the store's TTL"""
+        key = (store, query)
+        expires_at = time.time() + (store_ttl(store) if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO product_cache (store, query, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (store, query, json.dumps(value), expires_at)
+                )
+                self._db.commit()
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers"""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (_, expires_at) in self._entries.items() if expires_at <= now]:
+                del self._entries[key]
+            if self._db is not None:
+                self._db.execute("DELETE FROM product_cache WHERE expires_at <= ?", (now,))
+                self._db.commit()
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+# Process-wide cache used by the chat pipeline
+cache = ProductCache()
+
+metrics.gauge("product_cache_hits", "Store lookups answered from the cache", lambda: cache.hits)
+metrics.gauge("product_cache_misses", "Store lookups not found in the cache", lambda: cache.misses)
+metrics.gauge("product_cache_entries", "Entries in the in-memory cache tier", lambda: len(cache._entries))
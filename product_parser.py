@@ -0,0 +1,143 @@
+import re
+
+# Rule-based parser for the common "<product>, <quantity> under <price>" queries.
+# It returns the same fields as the CrewAI Product Parser task, plus a confidence
+# score so the caller can fall back to the LLM crew for anything unusual.
+
+# Indian price shorthand: "50k", "1.5 lakh"
+PRICE_MULTIPLIERS = {"k": 1000, "thousand": 1000, "lakh": 100000, "lakhs": 100000, "lac": 100000, "lacs": 100000}
+
+# A bare "max" is part of model names ("iPhone 15 Pro Max", "Air Max 270"), so
+# it only means a budget before a currency marker or "price"
+PRICE_PATTERN = re.compile(
+    r"\b(?:(?:under|below|less than|within|up ?to|budget(?: of)?)\s*(?:rs\.?|inr|₹)?|"
+    r"max(?:imum)?\s*(?:(?:price|budget)\s*(?:of\s*)?(?:rs\.?|inr|₹)?|rs\.?|inr|₹))"
+    r"\s*(\d[\d,]*(?:\.\d+)?)(?:\s*(k|thousand|lakhs?|lacs?)\b)?\s*(?:rs\.?|rupees|inr|/-)?",
+    re.IGNORECASE
+)
+# "3G", "4G" and "5G" are network generations, not grams
+QUANTITY_PATTERN = re.compile(
+    r"\b(?![3-5]g\b)(\d+(?:\.\d+)?)\s*(ml|l|ltr|litres?|liters?|g|gm|gms|grams?|kg|kgs)\b",
+    re.IGNORECASE
+)
+PACK_PATTERN = re.compile(
+    r"\b(?:pack|set|combo) of\s*(\d+)\b|\b(\d+)\s*(?:pack|pcs|pieces)\b",
+    re.IGNORECASE
+)
+# Leading phrases that are not part of the product name
+FILLER_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:i want(?: to buy)?|i need|find(?: me)?|show(?: me)?|search(?: for)?|"
+    r"look(?:ing)? for|get(?: me)?|buy|best (?:price|deal)s? (?:for|on)|price of)\s+(?:a |an |the |some )?",
+    re.IGNORECASE
+)
+# Words suggesting a conversational or multi-part request the rules can't handle
+COMPLEX_PATTERN = re.compile(
+    r"\?|\b(?:which|what|how|compare|vs|versus|recommend|suggest|better|cheapest|or)\b",
+    re.IGNORECASE
+)
+
+# Shopping list separators: new lines, semicolons, bullets and numbered items
+ITEM_SEPARATOR_PATTERN = re.compile(r"\s*(?:[\r\n;]+|^\s*(?:[-*•]|\d+[.)])\s+)\s*", re.MULTILINE)
+# Commas between items; a comma inside a number, as in "₹1,500", is not one
+COMMA_PATTERN = re.compile(r"(?<!\d),|,(?!\d)")
+# Spec-like parts such as "8GB RAM", "42H Playtime" or "6.1 inch": a product
+# title listing its specs, not a shopping list
+SPEC_PATTERN = re.compile(
+    r"^\d+(?:\.\d+)?(?:[a-z]+\b|\s?(?:gb|tb|mb|mah|hz|mp|w|inch|inches|cm|mm)\b)",
+    re.IGNORECASE
+)
+# Single-word features such as "cordless" or "waterproof"
+MODIFIER_PATTERN = re.compile(r"^[a-z]+(?:less|proof|able|free)$", re.IGNORECASE)
+# Store titles capitalise every word of their features ("Arctic White", "Oil
+# Control", "Bluetooth On Ear Headphones"); shopping lists are typed
+TITLE_CASE_PATTERN = re.compile(r"^[A-Z][A-Za-z]*(?:\s+(?:[A-Z0-9][\w-]*|&))+$")
+# Comma-separated parts that describe the previous item rather than a new one
+ATTRIBUTE_PATTERN = re.compile(
+    r"^(?:size|color|colour|pack|set|combo|under|below|upto|up to|max|budget|for)\b|"
+    r"^(?:black|white|blue|red|green|grey|gray|silver|gold|pink|brown|men|women|kids)$",
+    re.IGNORECASE
+)
+
+def _number(text, multiplier=1):
+    value = float(text.replace(",", "")) * multiplier
+    return int(value) if value.is_integer() else value
+
+def _tidy(text):
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s+([,.])", r"\1", text)
+    return text.strip(" ,.-;:")
+
+def parse_product(user_input):
+    """Parse a product query into (details, confidence) without an LLM"""
+    rest = user_input.strip()
+    price_max = None
+    quantities = []
+
+    # A price run into other letters ("under 50m") is a unit the rules don't know
+    unknown_unit = False
+    price = PRICE_PATTERN.search(rest)
+    if price:
+        suffix = price.group(2)
+        price_max = _number(price.group(1), PRICE_MULTIPLIERS[suffix.lower()] if suffix else 1)
+        number_end = price.end(2) if suffix else price.end(1)
+        unknown_unit = rest[number_end:number_end + 1].isalpha()
+        rest = rest[:price.start()] + " " + rest[price.end():]
+
+    for match in QUANTITY_PATTERN.finditer(rest):
+        quantities.append(f"{match.group(1)} {match.group(2)}")
+    rest = QUANTITY_PATTERN.sub(" ", rest)
+    pack = PACK_PATTERN.search(rest)
+    if pack:
+        quantities.append(f"Pack of {pack.group(1) or pack.group(2)}")
+        rest = rest[:pack.start()] + " " + rest[pack.end():]
+
+    # Same field order as the crew output, including only fields that are present
+    product = _tidy(FILLER_PATTERN.sub("", _tidy(rest)))
+    details = {}
+    if product:
+        details["product"] = product
+    if quantities:
+        details["quantity"] = ", ".join(quantities)
+    if price_max is not None:
+        details["price_max"] = price_max
+
+    words = product.split()
+    if not words:
+        confidence = 0.0
+    elif COMPLEX_PATTERN.search(product):
+        confidence = 0.3
+    elif len(words) > 15 or unknown_unit:
+        confidence = 0.5
+    else:
+        confidence = 0.9
+    return details, confidence
+
+def _describes_previous(part):
+    """Whether a comma-separated part is a quantity, price or attribute of the item before it"""
+    rest = PACK_PATTERN.sub(" ", QUANTITY_PATTERN.sub(" ", PRICE_PATTERN.sub(" ", part)))
+    rest = _tidy(rest)
+    return (len(re.sub(r"[^a-zA-Z]", "", rest)) < 3 or bool(ATTRIBUTE_PATTERN.search(rest))
+            or bool(MODIFIER_PATTERN.search(rest)) or bool(TITLE_CASE_PATTERN.search(rest)))
+
+def _is_item(part, first):
+    """Whether a comma-separated part reads as a product query on its own"""
+    if not first and (SPEC_PATTERN.search(part) or _describes_previous(part)):
+        return False
+    return parse_product(part)[1] >= 0.9
+
+def split_items(user_input):
+    """Split a shopping list message into one query per product
+
+    New lines, semicolons and bullets always separate items. Commas only do
+    when every part reads as a product on its own: "perfume 100ml, trimmer,
+    shampoo 650ml" gives three queries, while "Wild Stone Edge Perfume for
+    Men, 100 Ml" and "Philips trimmer, cordless" stay one.
+    """
+    items = []
+    for line in ITEM_SEPARATOR_PATTERN.split(user_input):
+        parts = [part for part in (_tidy(part) for part in COMMA_PATTERN.split(line)) if part]
+        if len(parts) > 1 and all(_is_item(part, index == 0) for index, part in enumerate(parts)):
+            items.extend(parts)
+        elif parts:
+            items.append(", ".join(parts))
+    return items
@@ -0,0 +1,93 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from functools import lru_cache
+import json
+import re
+import metrics
+from results import ProductResult
+
+# Keeps the CrewAI prompts small. The static instructions are built once and
+# reused, and store results are cut down to the few fields the reply uses
+# before they are embedded. Every prompt's size is measured, along with the
+# tokens saved by compacting its data.
+
+# Longest product name passed to the LLM; store titles are often keyword lists
+MAX_NAME_CHARS = 80
+
+# Query parameters that only track the click
+TRACKING_PARAMS = re.compile(r"^(?:utm_\w+|ref|ref_|tag|crid|keywords|sprefix|qid|sr|lid|marketplace|store|srno|otracker\w*|fm|iid|ppt|ppn|ssid)$")
+
+EXTRACTION_INSTRUCTIONS = (
+    "Extract product search details from the user's message.\n"
+    'Example: "Wild Stone Edge EDP Premium Perfume for Men, 100 Ml" -> '
+    '{"product":"Wild Stone Edge EDP Premium Perfume for Men","quantity":"100 Ml"}'
+)
+EXTRACTION_OUTPUT = (
+    'A JSON object with only the fields present in the message: "product", '
+    '"quantity", "price_max" (number only), "other_filters".'
+)
+
+def estimate_tokens(text):
+    """Approximate Llama 3 token count: about 4 characters per token for English"""
+    return max(1, (len(text) + 3) // 4)
+
+def compact_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+def clean_url(url):
+    """Drop tracking parameters, fragments and Amazon's /ref= suffix from a product URL"""
+    if not url:
+        return url
+    parts = urlsplit(url)
+    path = re.sub(r"/ref=[^/]*$", "", parts.path)
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not TRACKING_PARAMS.match(k)])
+    return urlunsplit((parts.scheme, parts.netloc, path, query, ""))
+
+def compact_result(result):
+    """The fields of a store result the reply actually uses, with short keys"""
+    product = ProductResult.from_dict(result)
+    if not product.available:
+        return {"available": False}
+    name = product.product_name
+    if len(name) > MAX_NAME_CHARS:
+        name = name[:MAX_NAME_CHARS].rsplit(" ", 1)[0].rstrip(",;:-")
+    compact = {"name": name}
+    if product.price is not None:
+        compact["price"] = int(product.price) if product.price == int(product.price) else product.price
+    if product.rating is not None:
+        compact["rating"] = product.rating
+    compact["url"] = clean_url(product.purchase_url)
+    return compact
+
+def extraction_prompt(user_input):
+    """(description, expected_output) for the Product Parser task"""
+    description = f'{EXTRACTION_INSTRUCTIONS}\nMessage: "{user_input}"'
+    record("product_parser", description + EXTRACTION_OUTPUT)
+    return description, EXTRACTION_OUTPUT
+
+@lru_cache(maxsize=32)
+def response_instructions(labels):
+    """Static part of the Response Generator task for a tuple of store labels"""
+    store_names = " and ".join(labels)
+    description = (
+        f"Write a short, friendly reply with emojis comparing the {store_names} deals below. "
+        "Greet the user, name the product, then for each store give the product name, "
+        "price in ₹, rating and purchase URL. Say plainly when a store has no result. "
+        "Focus on price and buy links."
+    )
+    expected_output = f"A short, emoji-enhanced reply showing the {store_names} deals, focused on price and buy links."
+    return description, expected_output
+
+def response_prompt(user_input, labels, store_details):
+    """(description, expected_output) for the Response Generator task"""
+    instructions, expected_output = response_instructions(tuple(labels))
+    results = {label: compact_result(result) for label, result in zip(labels, store_details.values())}
+    description = f'{instructions}\nUser asked: "{user_input}"\nResults: {compact_json(results)}'
+    # Saved tokens: the same results as full result dicts
+    full = compact_json(dict(zip(labels, store_details.values())))
+    saved = estimate_tokens(full) - estimate_tokens(compact_json(results))
+    record("response_generator", description + expected_output, saved)
+    return description, expected_output
+
+def record(agent, prompt, saved=0):
+    """Measure a prompt and the tokens compaction saved on it"""
+    metrics.record_prompt(agent, estimate_tokens(prompt), max(0, saved))
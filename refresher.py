@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+from collections import OrderedDict
+from dotenv import load_dotenv
+from sqlalchemy import func
+import threading
+import os
+import ai_processor
+import browser_pool
+import marketplaces
+import metrics
+import jobs
+import conversation_context
+from product_cache import cache as product_cache, normalize_query
+from product_parser import parse_product, split_items
+
+# Load environment variables
+load_dotenv()
+
+# Background refresh of popular products: the most asked-for queries in recent
+# chat history have their store results fetched again shortly before the
+# cached ones expire, so users asking for them are served from a warm cache.
+
+PRICE_REFRESH = os.getenv("PRICE_REFRESH", "1") == "1"
+# Seconds between refresh passes
+REFRESH_INTERVAL = float(os.getenv("REFRESH_INTERVAL", "300"))
+# How many of the most popular queries are kept warm
+REFRESH_TOP_N = int(os.getenv("REFRESH_TOP_N", "20"))
+# Chat history window used to rank popularity, in days
+REFRESH_WINDOW_DAYS = float(os.getenv("REFRESH_WINDOW_DAYS", "7"))
+# Refresh entries that expire within this many seconds (at least one interval)
+REFRESH_AHEAD = float(os.getenv("REFRESH_AHEAD", str(REFRESH_INTERVAL * 2)))
+# Budget per pass: store lookups (each may need a browser agent) and LLM crew extractions
+REFRESH_MAX_LOOKUPS = int(os.getenv("REFRESH_MAX_LOOKUPS", "10"))
+REFRESH_MAX_EXTRACTIONS = int(os.getenv("REFRESH_MAX_EXTRACTIONS", "2"))
+# Skip the pass while this many chats are queued or running, in jobs or inline
+REFRESH_MAX_PENDING = int(os.getenv("REFRESH_MAX_PENDING", "2"))
+
+refreshes = metrics.counter("price_refreshes_total", "Background store refreshes, by store and outcome")
+refresh_passes = metrics.counter("price_refresh_passes_total", "Background refresh passes, by outcome")
+
+
+def popular_messages(message_model, limit, since):
+    """(content, count) of the most repeated user messages since a time"""
+    count = func.count(message_model.id)
+    return (
+        message_model.query
+        .with_entities(message_model.content, count)
+        .filter(message_model.is_user.is_(True), message_model.timestamp >= since)
+        .group_by(message_model.content)
+        .order_by(count.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+class PriceRefresher:
+    """Keeps the product cache warm for the most popular queries"""
+
+    def __init__(self, app, message_model):
+        self.app = app
+        self.message_model = message_model
+        # Extracted details by query text, so the crew runs once per query
+        self._details = OrderedDict()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="price-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(REFRESH_INTERVAL):
+            try:
+                self.run_once()
+            except Exception as e:
+                refresh_passes.inc(outcome="error")
+                print(f"Error refreshing popular products: {e}")
+
+    def popular_products(self):
+        """Details of the top queries, most popular first, within the extraction budget
+
+        Messages are routed the way chats are: follow-ups name no product of
+        their own and are skipped, and each item of a shopping list counts as
+        its own query.
+        """
+        since = datetime.utcnow() - timedelta(days=REFRESH_WINDOW_DAYS)
+        with self.app.app_context():
+            # Fetch extra rows since differently worded messages can be the same product
+            rows = popular_messages(self.message_model, REFRESH_TOP_N * 5, since)
+
+        counts = {}
+        products = {}
+        extractions = REFRESH_MAX_EXTRACTIONS
+        for content, count in rows:
+            if conversation_context.is_reference(content, conversation_context.mentioned_stores(content)):
+                continue
+            for item in split_items(content)[:ai_processor.MAX_BATCH_ITEMS]:
+                details = self._details.get(item)
+                if details is None:
+                    details, confidence = parse_product(item)
+                    if confidence < ai_processor.PARSER_MIN_CONFIDENCE:
+                        if extractions <= 0:
+                            continue
+                        extractions -= 1
+                        details = ai_processor.extract_product_details(item)
+                    self._details[item] = details
+                    while len(self._details) > REFRESH_TOP_N * 10:
+                        self._details.popitem(last=False)
+                query = normalize_query(details)
+                counts[query] = counts.get(query, 0) + count
+                products.setdefault(query, details)
+        top = sorted(counts, key=counts.get, reverse=True)[:REFRESH_TOP_N]
+        return [(query, products[query]) for query in top]
+
+    def run_once(self):
+        """One refresh pass; returns the number of store lookups made"""
+        if jobs.load() >= REFRESH_MAX_PENDING:
+            refresh_passes.inc(outcome="busy")
+            return 0
+
+        budget = REFRESH_MAX_LOOKUPS
+        for query, details in self.popular_products():
+            for store in marketplaces.adapters():
+                if budget <= 0:
+                    refresh_passes.inc(outcome="budget_spent")
+                    return REFRESH_MAX_LOOKUPS
+                if product_cache.expires_in(store, query) > REFRESH_AHEAD:
+                    continue
+                # Live traffic takes priority over keeping the cache warm
+                if jobs.load() >= REFRESH_MAX_PENDING:
+                    refresh_passes.inc(outcome="busy")
+                    return REFRESH_MAX_LOOKUPS - budget
+                budget -= 1
+                before = product_cache.expires_in(store, query)
+                browser_pool.run(ai_processor.lookup_store(store, details, refresh=True))
+                refreshed = product_cache.expires_in(store, query) > before
+                refreshes.inc(store=store, outcome="refreshed" if refreshed else "failed")
+        refresh_passes.inc(outcome="done")
+        return REFRESH_MAX_LOOKUPS - budget
+
+
+_refresher = None
+
+def start(app, message_model):
+    """Start the background refresher once per process, if PRICE_REFRESH is on"""
+    global _refresher
+    if PRICE_REFRESH and _refresher is None:
+        _refresher = PriceRefresher(app, message_model).start()
+    return _refresher
@@ -0,0 +1,113 @@
+from collections import deque
+import threading
+import asyncio
+import time
+
+# Per-store protection for marketplace lookups: a token bucket to stay under
+# the store's request rate, and a circuit breaker that fails fast while the
+# store is throttling us or hanging.
+
+
+class TokenBucket:
+    """Token bucket rate limiter refilled at rate tokens per second"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available, without waiting"""
+        return self.wait_time() == 0
+
+    def wait_time(self):
+        """Take a token, returning 0, or return how long until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    async def acquire(self, max_wait):
+        """Wait up to max_wait seconds for a token; False if that's not enough"""
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.wait_time()
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker driven by the recent failure rate"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate=0.5, window=10, min_calls=4, reset_timeout=30.0):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Whether a call may go ahead; half-open lets one probe through at a time"""
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self):
+        """Give up a half-open probe without an outcome, e.g. when the caller was cancelled"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            self._probing = False
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            self._probing = False
+            if self._state == self.HALF_OPEN:
+                self._trip()
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
@@ -0,0 +1,189 @@
+from jinja2 import Environment
+from results import ProductResult
+
+# Deterministic chat reply for a product comparison. Same layout the Response
+# Generator agent was asked for, without an LLM round trip.
+
+STORE_LABELS = {
+    "amazon": "Amazon",
+    "flipkart": "Flipkart",
+}
+
+RESPONSE_TEMPLATE = """Hi there! 👋 Here's what I found for {{ product }}.
+
+🛍️ Product: {{ product }}
+{% for deal in deals %}
+{{ deal.emoji }} {{ deal.label }} Deal:
+{% if deal.available -%}
+1. 📦 {{ deal.name }}
+2. 💰 Price: {{ deal.price_text }}
+3. ⭐ Rating: {{ deal.rating }}
+4. 🔗 {{ deal.url }}
+{% for note in deal.notes %}{{ note }}
+{% endfor %}{% else -%}
+❌ Not available on {{ deal.label }} right now.
+{% endif %}{% endfor %}
+{{ verdict }}"""
+
+BATCH_TEMPLATE = """Hi there! 👋 Here's a price comparison for your {{ rows|length }} items.
+{% for row in rows %}
+{{ loop.index }}. 🛍️ {{ row.product }}
+{% for deal in row.deals %}{% if deal.available -%}
+{{ deal.emoji }} {{ deal.label }}: {{ deal.price_text }}{% if deal.best %} ✅{% endif %} - {{ deal.url }}
+{% else -%}
+{{ deal.emoji }} {{ deal.label }}: not available
+{% endif %}{% endfor %}{% endfor %}
+{{ summary }}"""
+
+STORE_EMOJI = {
+    "amazon": "🟠",
+    "flipkart": "🔵",
+}
+
+def register_store(store, label, emoji="🛒"):
+    """Make a store's display name and emoji known to the renderer"""
+    STORE_LABELS[store] = label
+    STORE_EMOJI[store] = emoji
+
+# Functions (product_details, deal) -> extra line for a deal, or None
+_deal_notes = []
+
+def register_deal_note(note):
+    """Add a function that can put an extra line under each available deal"""
+    _deal_notes.append(note)
+
+def deal_notes(product_details, deal):
+    """Extra lines for one deal from the registered note functions"""
+    notes = []
+    for note in _deal_notes:
+        try:
+            text = note(product_details, deal)
+        except Exception as e:
+            print(f"Error adding a deal note: {e}")
+            continue
+        if text:
+            notes.append(text)
+    return notes
+
+_env = Environment(autoescape=False, keep_trailing_newline=False)
+_template = _env.from_string(RESPONSE_TEMPLATE)
+_batch_template = _env.from_string(BATCH_TEMPLATE)
+
+def format_price(amount):
+    """Format a rupee amount, dropping zero paise"""
+    if amount == int(amount):
+        return f"₹{int(amount):,}"
+    return f"₹{amount:,.2f}"
+
+def describe_product(product_details, user_input=""):
+    """Readable product name from extracted details"""
+    if isinstance(product_details, dict) and product_details.get("product"):
+        name = product_details["product"]
+        if product_details.get("quantity"):
+            name = f"{name}, {product_details['quantity']}"
+        return name
+    return user_input
+
+def build_deal(store, result):
+    """Normalize one store result for the template"""
+    deal = {
+        "store": store,
+        "label": STORE_LABELS.get(store, store.title()),
+        "emoji": STORE_EMOJI.get(store, "🛒"),
+        "available": False,
+        "price": None,
+    }
+    product = ProductResult.from_dict(result)
+    if not product.available:
+        return deal
+    deal.update({
+        "available": True,
+        "name": product.product_name,
+        "price": product.price,
+        "price_text": format_price(product.price) if product.price is not None else "N/A",
+        "rating": f"{product.rating:g}" if product.rating is not None else "N/A",
+        "url": product.purchase_url or "N/A",
+    })
+    return deal
+
+def compare_deals(deals):
+    """One-line verdict comparing store prices"""
+    priced = sorted((d for d in deals if d["available"] and d["price"] is not None), key=lambda d: d["price"])
+    available = [d for d in deals if d["available"]]
+    if not available:
+        return "😕 I couldn't find this product on any store right now. Try a different name or spelling."
+    if len(priced) >= 2:
+        cheapest, runner_up = priced[0], priced[1]
+        difference = runner_up["price"] - cheapest["price"]
+        if difference == 0:
+            return f"🤝 Same price on {cheapest['label']} and {runner_up['label']}."
+        return f"💡 {cheapest['label']} is {format_price(difference)} cheaper than {runner_up['label']}."
+    if len(available) == 1:
+        return f"💡 Only available on {available[0]['label']}."
+    return "💡 Check the links above for the latest prices."
+
+def render_deal_line(store, result):
+    """One-line summary of a single store result, for streaming partial replies"""
+    deal = build_deal(store, result)
+    if not deal["available"]:
+        return f"{deal['emoji']} {deal['label']}: not available right now"
+    return f"{deal['emoji']} {deal['label']}: {deal['price_text']} - {deal['name']}"
+
+def render_response(user_input, product_details, store_details):
+    """Render the comparison reply for a dict of store name -> store result"""
+    deals = [build_deal(store, result) for store, result in store_details.items()]
+    for deal in deals:
+        deal["notes"] = deal_notes(product_details, deal) if deal["available"] else []
+    return _template.render(
+        product=describe_product(product_details, user_input),
+        deals=deals,
+        verdict=compare_deals(deals),
+    ).strip()
+
+def render_cheapest(user_input, product_details, store_details):
+    """Short answer to "which one is cheaper?" from results already shown"""
+    deals = [build_deal(store, result) for store, result in store_details.items()]
+    priced = sorted((d for d in deals if d["available"] and d["price"] is not None), key=lambda d: d["price"])
+    product = describe_product(product_details, user_input)
+    if not priced:
+        return f"😕 None of the stores had a price for {product} when I checked."
+    cheapest = priced[0]
+    lines = [f"💡 {cheapest['label']} has the lowest price for {product}: {cheapest['price_text']}."]
+    lines += [f"{deal['emoji']} {deal['label']}: {deal['price_text']}" for deal in priced[1:]]
+    lines.append(f"🔗 {cheapest['url']}")
+    return "\n".join(lines)
+
+def basket_summary(rows):
+    """One-line total for buying every item at its cheapest store"""
+    total = 0
+    stores = {}
+    missing = 0
+    for row in rows:
+        best = next((deal for deal in row["deals"] if deal.get("best")), None)
+        if best is None:
+            missing += 1
+            continue
+        total += best["price"]
+        stores[best["label"]] = stores.get(best["label"], 0) + 1
+    if not stores:
+        return "😕 I couldn't find prices for these items right now. Try more specific names."
+    split = ", ".join(f"{label} for {count} item{'s' if count > 1 else ''}" for label, count in stores.items())
+    summary = f"🧾 Cheapest basket: {format_price(total)} ({split})."
+    if missing:
+        summary += f" {missing} item{'s' if missing > 1 else ''} had no price."
+    return summary
+
+def render_batch(rows):
+    """Render one combined comparison for several items
+
+    rows are dicts with "query", "product" (extracted details) and "stores"
+    (store name -> store result), in the order the user listed the items.
+    """
+    rendered = []
+    for row in rows:
+        deals = [build_deal(store, result) for store, result in row["stores"].items()]
+        priced = [deal for deal in deals if deal["available"] and deal["price"] is not None]
+        if priced:
+            min(priced, key=lambda deal: deal["price"])["best"] = True
+        rendered.append({"product": describe_product(row["product"], row["query"]), "deals": deals})
+    return _batch_template.render(rows=rendered, summary=basket_summary(rendered)).strip()
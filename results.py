@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+import json
+import re
+
+# Store lookup results in one validated shape. Browser agents answer in free
+# text that is usually, but not always, JSON: wrapped in ``` fences, followed
+# by prose, or just a sentence saying the product isn't there. Everything is
+# turned into a ProductResult, and only its compact dict form is cached,
+# streamed to clients and passed to reply generation.
+
+# Phrases meaning a store has no usable result for the query
+NOT_AVAILABLE_MARKERS = ("not available", "not found", "no results", "error retrieving", "timed out", "unavailable")
+
+FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+RATING_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+_decoder = json.JSONDecoder()
+
+
+class UnreadableAnswerError(Exception):
+    """Raised when a browser agent's answer is neither a result nor a clear not-available"""
+
+
+@dataclass(slots=True)
+class ProductResult:
+    """One store's answer: a priced product, or an explicit not-available state"""
+
+    product_name: str
+    price: float = None
+    rating: float = None
+    purchase_url: str = ""
+    available: bool = True
+    reason: str = ""
+
+    @classmethod
+    def not_available(cls, reason, purchase_url=""):
+        return cls(product_name="", purchase_url=purchase_url, available=False, reason=reason)
+
+    @classmethod
+    def from_dict(cls, data, default_url=""):
+        """Validate a result dict (from a scraper, an agent, or the cache)"""
+        if not isinstance(data, dict):
+            return cls.not_available("No result", default_url)
+        url = str(data.get("purchase_url") or default_url)
+        if data.get("available") is False:
+            return cls.not_available(str(data.get("reason") or "Not available"), url)
+        name = str(data.get("product_name") or "").strip()
+        if not name or name.upper() == "N/A" or any(marker in name.lower() for marker in NOT_AVAILABLE_MARKERS):
+            return cls.not_available(name or "No product name", url)
+        return cls(
+            product_name=name,
+            price=parse_price(data.get("price")),
+            rating=parse_rating(data.get("rating")),
+            purchase_url=url,
+        )
+
+    @classmethod
+    def from_agent_output(cls, output, default_url=""):
+        """Validate a browser agent's final answer, whatever shape the text is in
+
+        Raises UnreadableAnswerError for an answer that says nothing usable, such
+        as None from an agent that never finished, so it is treated as a failed
+        lookup rather than cached as "not available".
+        """
+        if isinstance(output, dict):
+            return cls.from_dict(output, default_url)
+        data = extract_json(output) if isinstance(output, str) else None
+        if isinstance(data, list):
+            data = next((item for item in data if isinstance(item, dict)), None)
+        if isinstance(data, dict):
+            return cls.from_dict(data, default_url)
+        text = str(output or "").strip()
+        if any(marker in text.lower() for marker in NOT_AVAILABLE_MARKERS):
+            return cls.not_available(text[:200], default_url)
+        raise UnreadableAnswerError(f"Couldn't read the store's answer: {text[:100]!r}")
+
+    def to_dict(self):
+        """Compact JSON-safe form used by the cache, job events and replies"""
+        if not self.available:
+            return {"available": False, "reason": self.reason, "purchase_url": self.purchase_url}
+        return {
+            "available": True,
+            "product_name": self.product_name,
+            "price": self.price,
+            "rating": self.rating,
+            "purchase_url": self.purchase_url,
+        }
+
+
+def parse_price(value):
+    """Turn a price like '₹1,299.00' or 1299 into a float, or None"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", value)
+    if not match:
+        return None
+    return float(match.group(0).replace(",", ""))
+
+def parse_rating(value):
+    """Turn a rating like '4.2 out of 5 stars' or 4.2 into a float, or None"""
+    if isinstance(value, (int, float)):
+        rating = float(value)
+    else:
+        match = RATING_PATTERN.search(str(value or ""))
+        if not match:
+            return None
+        rating = float(match.group(0))
+    return rating if 0 <= rating <= 5 else None
+
+def extract_json(text):
+    """First JSON object or array in text, allowing code fences and surrounding prose"""
+    fenced = FENCE_PATTERN.search(text)
+    candidates = [fenced.group(1), text] if fenced else [text]
+    for candidate in candidates:
+        for start, char in enumerate(candidate):
+            if char not in "{[":
+                continue
+            try:
+                value, _ = _decoder.raw_decode(candidate, start)
+            except ValueError:
+                continue
+            if isinstance(value, (dict, list)) and value:
+                return value
+    return None
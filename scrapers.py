@@ -0,0 +1,103 @@
+from bs4 import BeautifulSoup
+from urllib.parse import urlencode, urljoin
+from dotenv import load_dotenv
+from results import ProductResult, parse_price
+import httpx
+import os
+
+# Load environment variables
+load_dotenv()
+
+# Shared pieces of the direct (no LLM) store scrapers. The store modules build
+# search URLs and parse their own pages; this module fetches them.
+
+# Set DIRECT_SCRAPE=0 to always use the browser agents
+DIRECT_SCRAPE = os.getenv("DIRECT_SCRAPE", "1") != "0"
+SCRAPE_TIMEOUT = float(os.getenv("SCRAPE_TIMEOUT", "10"))
+# Only the top few results are considered, since later ones are rarely the same product
+MAX_RESULTS = 5
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+}
+
+# Created on first use on the browser loop, which runs every store lookup
+_client = None
+
+def get_client():
+    """Pooled async HTTP client (use on the shared browser loop)"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=SCRAPE_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+async def fetch(url):
+    """Fetch a page and return its HTML"""
+    response = await get_client().get(url)
+    response.raise_for_status()
+    return response.text
+
+def soup(html):
+    return BeautifulSoup(html, "html.parser")
+
+def text_of(node):
+    return " ".join(node.get_text(" ").split()) if node is not None else ""
+
+def search_terms(product_details):
+    """Search box text for extracted product details"""
+    if isinstance(product_details, dict):
+        return " ".join(str(product_details[key]) for key in ("product", "quantity") if product_details.get(key))
+    return str(product_details)
+
+def search_url(base_url, path, param, product_details):
+    """Store search URL for the product, e.g. https://www.amazon.in/s?k=..."""
+    return f"{base_url}{path}?{urlencode({param: search_terms(product_details)})}"
+
+def absolute_url(base_url, href):
+    return urljoin(base_url + "/", href) if href else ""
+
+def pick_result(results, product_details):
+    """First (most relevant) priced result within the price cap, or None"""
+    # The crew may give the cap as text, e.g. "₹500"
+    price_max = parse_price(product_details.get("price_max")) if isinstance(product_details, dict) else None
+    for result in results[:MAX_RESULTS]:
+        price = parse_price(result.get("price"))
+        if price is None:
+            continue
+        if price_max is not None and price > price_max:
+            continue
+        return result
+    return None
+
+async def scrape(product_details, url, parse_search, parse_product=None):
+    """Fetch a store search page and return the best result, or None if parsing fails"""
+    results = parse_search(await fetch(url))
+    if not results:
+        return None
+    result = pick_result(results, product_details)
+    first = results[0]
+    if result is None and parse_product is not None and not first.get("price") and first.get("purchase_url"):
+        # Search cards sometimes hide the price; read it from the product page
+        details = parse_product(await fetch(first["purchase_url"]), first["purchase_url"])
+        result = pick_result([details], product_details) if details else None
+    if result is None:
+        if any(parse_price(r.get("price")) is not None for r in results[:MAX_RESULTS]):
+            # The store has the product, just not within the user's budget
+            return ProductResult.not_available("Product not available within the price limit", url).to_dict()
+        return None
+    if not result.get("product_name") or not result.get("purchase_url"):
+        return None
+    return {
+        "product_name": result["product_name"],
+        "price": result["price"],
+        "rating": result.get("rating") or "N/A",
+        "purchase_url": result["purchase_url"],
+    }
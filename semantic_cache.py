@@ -0,0 +1,248 @@
+from dotenv import load_dotenv
+import numpy as np
+import threading
+import atexit
+import zlib
+import json
+import time
+import os
+import re
+import metrics
+from product_parser import parse_product
+
+# Load environment variables
+load_dotenv()
+
+# Answers for paraphrased queries: "wild stone edge perfume 100ml" and "Wild
+# Stone Edge EDP men 100 Ml" are the same product, but exact cache keys differ.
+# Queries are hashed into character n-gram vectors, weighted by IDF over the
+# index, and matched by cosine similarity, which also forgives typos and
+# spacing ("wildstone"). The words that pick a different product are checked
+# exactly first: sizes, prices and other numbers and model suffixes ("Ultra")
+# must be the same, and a gender or concentration can't contradict the
+# other query's, though one query may leave it out.
+
+SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "1") == "1"
+# Minimum cosine similarity for two queries to count as the same product
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.8"))
+MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+# Cached answers quote prices, so they expire like store results do
+TTL = float(os.getenv("SEMANTIC_CACHE_TTL", os.getenv("CACHE_TTL", "1800")))
+# Optional file prefix for persisting the index (<path>.npz and <path>.json)
+CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH") or None
+# Save to disk after this many new entries, and at exit
+SAVE_EVERY = int(os.getenv("SEMANTIC_CACHE_SAVE_EVERY", "20"))
+
+DIMENSIONS = 2048
+NGRAM_SIZES = (2, 3, 4)
+
+# Words that describe almost any listing and say nothing about which product it is.
+# Gender and fragrance concentration are kept: they pick a different product.
+GENERIC_WORDS = {
+    "a", "an", "the", "for", "with", "and", "of", "new", "original", "premium",
+    "long", "lasting", "perfume", "spray",
+}
+# Spellings of the same gender or concentration
+WORD_FORMS = {
+    "mens": "men", "man": "men", "male": "men", "gents": "men",
+    "womens": "women", "woman": "women", "female": "women", "ladies": "women",
+}
+# Words that must not contradict the other query's, if it has any
+GENDER_WORDS = {"men", "women", "unisex", "boys", "girls", "kids"}
+CONCENTRATION_WORDS = {"edp", "edt", "edc", "parfum", "cologne"}
+# Model suffixes that name a different product when added or dropped
+MODEL_WORDS = {"pro", "max", "ultra", "plus", "mini", "lite", "fe", "neo", "prime"}
+MODEL_CODE_PATTERN = re.compile(r"^[a-z]+\d")
+PHRASE_FORMS = (
+    (re.compile(r"\beau de parfum\b"), "edp"),
+    (re.compile(r"\beau de toilette\b"), "edt"),
+)
+
+lookups = metrics.counter("semantic_cache_lookups_total", "Semantic cache lookups, by outcome")
+
+def query_text(user_input):
+    """Product, quantity and price of a message as one lowercase string"""
+    details, _ = parse_product(user_input)
+    parts = [details.get("product") or user_input]
+    parts += [str(details[field]) for field in ("quantity", "price_max") if details.get(field)]
+    text = re.sub(r"[^\w\s.]", " ", " ".join(parts)).lower()
+    for pattern, form in PHRASE_FORMS:
+        text = pattern.sub(form, text)
+    words = [WORD_FORMS.get(word, word) for word in text.split()]
+    return " ".join(word for word in words if word not in GENERIC_WORDS)
+
+def signature(text):
+    """The parts of a query that pick a product: (numbers, model codes and suffixes, gender, concentration)"""
+    words = set(text.split())
+    return (
+        frozenset(re.findall(r"\d+(?:\.\d+)?", text)),
+        # Codes like "S23" and "A23" share their number
+        frozenset(words & MODEL_WORDS | {word for word in words if MODEL_CODE_PATTERN.match(word)}),
+        frozenset(words & GENDER_WORDS),
+        frozenset(words & CONCENTRATION_WORDS),
+    )
+
+def same_product(a, b):
+    """Whether two signatures can describe the same product"""
+    numbers_a, models_a, genders_a, concentrations_a = a
+    numbers_b, models_b, genders_b, concentrations_b = b
+    if numbers_a != numbers_b or models_a != models_b:
+        return False
+    # Leaving out a gender or concentration is fine; naming another one isn't
+    return (not genders_a or not genders_b or genders_a == genders_b) and \
+        (not concentrations_a or not concentrations_b or concentrations_a == concentrations_b)
+
+def similarity_text(text):
+    """The query without its gender and concentration, which signature() already compares"""
+    return " ".join(word for word in text.split() if word not in GENDER_WORDS | CONCENTRATION_WORDS)
+
+def vectorize(text):
+    """Hashed character n-gram counts, log-scaled"""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    # Spaces are dropped inside words' n-grams so "100 ml" and "100ml" match
+    for word in text.split():
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                vector[zlib.crc32(padded[i:i + n].encode()) % DIMENSIONS] += 1
+    joined = text.replace(" ", "")
+    for i in range(len(joined) - 2):
+        vector[zlib.crc32(joined[i:i + 3].encode()) % DIMENSIONS] += 1
+    return np.log1p(vector)
+
+
+class SemanticCache:
+    """Bounded LRU index of past queries and their final replies"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, threshold=SIMILARITY_THRESHOLD, ttl=TTL, path=CACHE_PATH):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.path = path
+        self._vectors = np.zeros((max_entries, DIMENSIONS), dtype=np.float32)
+        self._entries = [None] * max_entries
+        self._last_used = np.zeros(max_entries)
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def _idf(self):
+        used = self._vectors[[i for i, e in enumerate(self._entries) if e is not None]]
+        df = np.count_nonzero(used, axis=0)
+        return np.log((1 + len(used)) / (1 + df)) + 1
+
+    def _weighted(self, vectors, idf):
+        weighted = vectors * idf
+        norms = np.linalg.norm(weighted, axis=-1, keepdims=True)
+        return weighted / np.maximum(norms, 1e-9)
+
+    def get(self, user_input):
+        """Cached reply for a message about an already answered product, or None"""
+        entry = self.get_entry(user_input)
+        return entry["response"] if entry is not None else None
+
+    def get_entry(self, user_input):
+        """Cached entry (reply, product and store results) for a message, or None"""
+        text = query_text(user_input)
+        query_signature = signature(text)
+        now = time.time()
+        with self._lock:
+            live = [
+                i for i, entry in enumerate(self._entries)
+                if entry is not None and entry["expires_at"] > now
+                and same_product(signature(entry["text"]), query_signature)
+            ]
+            if not live:
+                lookups.inc(outcome="miss")
+                return None
+            idf = self._idf()
+            query = self._weighted(vectorize(similarity_text(text)), idf)
+            scores = self._weighted(self._vectors[live], idf) @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                lookups.inc(outcome="miss")
+                return None
+            index = live[best]
+            self._last_used[index] = now
+            lookups.inc(outcome="hit")
+            return self._entries[index]
+
+    def set(self, user_input, response, product=None, stores=None):
+        """Remember the reply to a message, evicting the least recently used entry if full
+
+        product and stores are the turn's details and store results, kept so a
+        hit can take the conversation's follow-ups too.
+        """
+        text = query_text(user_input)
+        now = time.time()
+        with self._lock:
+            # Replace an existing entry for the same query, else an empty or expired
+            # slot, else the least recently used one
+            index = next((i for i, e in enumerate(self._entries) if e is not None and e["text"] == text), None)
+            if index is None:
+                free = [i for i, e in enumerate(self._entries) if e is None or e["expires_at"] <= now]
+                index = free[0] if free else int(np.argmin(self._last_used))
+            self._vectors[index] = vectorize(similarity_text(text))
+            self._entries[index] = {
+                "text": text,
+                "response": response,
+                "product": product,
+                "stores": stores or {},
+                "expires_at": now + self.ttl,
+            }
+            self._last_used[index] = now
+            self._unsaved += 1
+            save = self.path and self._unsaved >= SAVE_EVERY
+        if save:
+            self.save()
+
+    def __len__(self):
+        with self._lock:
+            return sum(1 for entry in self._entries if entry is not None)
+
+    def save(self):
+        """Write the index to <path>.npz and <path>.json"""
+        if not self.path:
+            return
+        with self._lock:
+            used = [i for i, entry in enumerate(self._entries) if entry is not None]
+            vectors = self._vectors[used]
+            last_used = self._last_used[used]
+            entries = [self._entries[i] for i in used]
+            self._unsaved = 0
+        try:
+            np.savez_compressed(self.path + ".npz", vectors=vectors, last_used=last_used)
+            with open(self.path + ".json", "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+        except OSError as e:
+            print(f"Error saving semantic cache: {e}")
+
+    def load(self):
+        """Read a saved index, dropping expired entries and any beyond max_entries"""
+        try:
+            arrays = np.load(self.path + ".npz")
+            with open(self.path + ".json", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            if os.path.exists(self.path + ".npz"):
+                print(f"Error loading semantic cache: {e}")
+            return
+        now = time.time()
+        keep = [i for i, entry in enumerate(entries) if entry["expires_at"] > now]
+        # Most recently used first, so the newest survive a smaller max_entries
+        keep.sort(key=lambda i: -arrays["last_used"][i])
+        keep = keep[:self.max_entries]
+        with self._lock:
+            for slot, i in enumerate(keep):
+                self._vectors[slot] = arrays["vectors"][i]
+                self._last_used[slot] = arrays["last_used"][i]
+                self._entries[slot] = entries[i]
+
+
+# Process-wide index used by the chat pipeline
+cache = SemanticCache()
+if cache.path:
+    atexit.register(cache.save)
+
+metrics.gauge("semantic_cache_entries", "Queries held in the semantic cache", lambda: len(cache))
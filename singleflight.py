@@ -0,0 +1,75 @@
+from concurrent.futures import Future
+import threading
+import asyncio
+import metrics
+
+# Request coalescing: while a call for a key is in flight, identical calls wait
+# for its result instead of starting their own.
+
+coalesced = metrics.counter("coalesced_requests_total", "Calls that joined an identical in-flight call, by group")
+
+
+class SingleFlight:
+    """Coalesce concurrent identical coroutine calls (use from one event loop)"""
+
+    def __init__(self, group):
+        self.group = group
+        self._calls = {}
+
+    async def do(self, key, factory):
+        """Await factory() for key, sharing one run among concurrent callers"""
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(factory())
+            call = self._calls[key] = {"task": task, "waiters": 0}
+            task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            coalesced.inc(group=self.group)
+        call["waiters"] += 1
+        try:
+            # Shielded so one caller's timeout doesn't cancel the shared run
+            return await asyncio.shield(call["task"])
+        except asyncio.CancelledError:
+            if call["waiters"] == 1 and not call["task"].done():
+                # Nobody else is waiting for it any more
+                call["task"].cancel()
+            raise
+        finally:
+            call["waiters"] -= 1
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self):
+        return len(self._calls)
+
+
+class ThreadSingleFlight:
+    """Coalesce concurrent identical blocking calls made from different threads"""
+
+    def __init__(self, group):
+        self.group = group
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args):
+        """Return fn(*args) for key, sharing one run among concurrent callers"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            coalesced.inc(group=self.group)
+            return future.result()
+        try:
+            result = fn(*args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
@@ -0,0 +1,119 @@
+import pytest
+import ai_processor
+from product_cache import ProductCache, normalize_query
+
+DETAILS = {"product": "boAt Airdopes 141"}
+RESULT = {"available": True, "product_name": "boAt Airdopes 141", "price": 1299.0, "rating": 4.1, "purchase_url": "https://example.com/a"}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ProductCache(max_entries=10, db_path=None)
+    monkeypatch.setattr(ai_processor, "product_cache", cache)
+    return cache
+
+
+def test_fresh_results_count_as_answered(cache):
+    cache.set("amazon", normalize_query(DETAILS), RESULT)
+    assert ai_processor.all_stores_answered(DETAILS, {"amazon": RESULT})
+
+
+def test_stale_results_are_not_answered(cache):
+    # What unavailable_result serves while a store's breaker is open
+    cache.set("amazon", normalize_query(DETAILS), RESULT, ttl=-1)
+    stale = ai_processor.unavailable_result("amazon", normalize_query(DETAILS))
+    assert stale == RESULT
+    assert not ai_processor.all_stores_answered(DETAILS, {"amazon": stale})
+
+
+def test_fast_fail_fallbacks_are_not_answered(cache):
+    fallback = ai_processor.unavailable_result("amazon", normalize_query(DETAILS))
+    assert not ai_processor.all_stores_answered(DETAILS, {"amazon": fallback})
+
+
+def test_compare_products_reports_failed_items(monkeypatch):
+    async def compare_item(query, stores=None, timeout=None):
+        if query == "bad":
+            raise RuntimeError("extraction failed")
+        return {"query": query, "product": {"product": query}, "stores": {}}
+
+    monkeypatch.setattr(ai_processor, "compare_item", compare_item)
+    rows = ai_processor.compare_products(["soap", "bad", "trimmer"])
+    assert [row["query"] for row in rows] == ["soap", "bad", "trimmer"]
+    assert rows[1]["error"] == "extraction failed"
+    assert "error" not in rows[0]
+
+
+def test_unreadable_agent_answer_is_a_failure(cache, monkeypatch):
+    import asyncio
+    import marketplaces
+    from resilience import CircuitBreaker
+    from results import ProductResult
+
+    adapter = marketplaces.get_adapter("amazon")
+
+    async def lookup(product_details):
+        # What an agent that never finished hands back
+        return ProductResult.from_agent_output(None, adapter.base_url).to_dict()
+
+    outcomes = []
+    breaker = CircuitBreaker()
+    monkeypatch.setattr(breaker, "record_success", lambda: outcomes.append(True))
+    monkeypatch.setattr(breaker, "record_failure", lambda: outcomes.append(False))
+    monkeypatch.setattr(adapter, "breaker", breaker)
+    monkeypatch.setattr(adapter, "lookup", lookup)
+    query = normalize_query(DETAILS)
+    result = asyncio.run(ai_processor.fetch_store(adapter, DETAILS, query, 5))
+    assert result == adapter.fallback()
+    assert outcomes == [False]
+    assert cache.get_stale("amazon", query) is None
+
+
+@pytest.fixture
+def no_groq(monkeypatch):
+    def groq_llm():
+        raise AssertionError("the Groq client was built")
+
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.setattr(ai_processor.llm_clients, "groq_llm", groq_llm)
+
+
+def test_extraction_without_groq_key_searches_the_message(no_groq):
+    details = ai_processor.extract_product_details("something nice for my dad")
+    assert details["product"]
+
+
+def test_reply_without_groq_key_is_rendered(no_groq, monkeypatch):
+    monkeypatch.setattr(ai_processor, "POLISH_RESPONSES", True)
+    reply = ai_processor.generate_response("boAt Airdopes 141", DETAILS, {"amazon": RESULT})
+    assert "1,299" in reply or "1299" in reply
+
+
+@pytest.fixture
+def contexts(monkeypatch):
+    from conversation_context import ConversationContexts
+
+    contexts = ConversationContexts()
+    monkeypatch.setattr(ai_processor.conversation_context, "contexts", contexts)
+    monkeypatch.setattr(ai_processor.conversation_context, "CONVERSATION_CONTEXT", True)
+    return contexts
+
+
+def test_context_lists_stores_in_registration_order(contexts):
+    turn = {"product": DETAILS, "stores": {"flipkart": RESULT, "amazon": RESULT}, "response": "reply"}
+    ai_processor.remember_context(1, turn)
+    assert list(contexts.get(1)[1]) == ["amazon", "flipkart"]
+
+
+def test_semantic_hit_becomes_the_conversation_context(contexts, monkeypatch):
+    from semantic_cache import SemanticCache
+
+    semantic = SemanticCache(max_entries=10, path=None)
+    monkeypatch.setattr(ai_processor.semantic_cache, "cache", semantic)
+    monkeypatch.setattr(ai_processor.semantic_cache, "SEMANTIC_CACHE", True)
+    semantic.set("boAt Airdopes 141", "reply", DETAILS, {"amazon": RESULT})
+    contexts.remember(1, {"product": "Philips trimmer"}, {"amazon": RESULT})
+
+    kind, reply = ai_processor.choose_pipeline("boat airdopes 141", conversation_id=1)
+    assert (kind, reply) == ("cached", "reply")
+    assert contexts.get(1) == (DETAILS, {"amazon": RESULT})
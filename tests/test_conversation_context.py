@@ -0,0 +1,54 @@
+import pytest
+import ai_processor  # registers the stores
+from conversation_context import follow_up, is_reference
+
+PRODUCT = {"product": "Wild Stone Edge perfume", "quantity": "100 ml"}
+AMAZON = {"available": True, "product_name": "Wild Stone Edge", "price": 349.0}
+FLIPKART = {"available": True, "product_name": "Wild Stone Edge EDP", "price": 329.0}
+CONTEXT = (PRODUCT, {"amazon": AMAZON, "flipkart": FLIPKART})
+
+
+def test_variant_asks_both_stores_again():
+    found = follow_up("what about the 50ml one?", CONTEXT)
+    assert found.intent == "variant"
+    assert found.product == {"product": "Wild Stone Edge perfume", "quantity": "50 ml"}
+    assert found.stores == ["amazon", "flipkart"]
+    assert found.known == {}
+
+
+def test_new_budget_is_a_variant():
+    found = follow_up("and under 300?", CONTEXT)
+    assert found.intent == "variant"
+    assert found.product["price_max"] == 300
+
+
+def test_compare_reuses_the_results():
+    found = follow_up("which one is cheaper?", CONTEXT)
+    assert found.intent == "compare"
+    assert found.stores == []
+    assert found.known == CONTEXT[1]
+
+
+def test_store_requery_keeps_the_other_results():
+    found = follow_up("check amazon again", CONTEXT)
+    assert found.intent == "store"
+    assert found.stores == ["amazon"]
+    assert found.known == {"flipkart": FLIPKART}
+    assert found.order == ["amazon", "flipkart"]
+    assert found.refresh
+
+
+def test_recap_shows_the_last_results():
+    found = follow_up("what about it?", CONTEXT)
+    assert found.intent == "recap"
+    assert found.known == CONTEXT[1]
+
+
+@pytest.mark.parametrize("message", ["Philips trimmer", "show me nike shoes", "iphone 15 under 50k"])
+def test_new_product_is_a_new_search(message):
+    assert not is_reference(message, [])
+    assert follow_up(message, CONTEXT) is None
+
+
+def test_no_context_is_a_new_search():
+    assert follow_up("which one is cheaper?", None) is None
@@ -0,0 +1,46 @@
+import pytest
+from product_parser import parse_product, split_items
+
+
+@pytest.mark.parametrize("message, items", [
+    ("perfume 100ml, trimmer, shampoo 650ml", ["perfume 100ml", "trimmer", "shampoo 650ml"]),
+    ("Wild Stone Edge Perfume for Men, 100 Ml", ["Wild Stone Edge Perfume for Men, 100 Ml"]),
+    ("trimmer under ₹1,500, perfume 100ml", ["trimmer under ₹1,500", "perfume 100ml"]),
+    ("Samsung Galaxy S23, 8GB RAM, 256GB Storage", ["Samsung Galaxy S23, 8GB RAM, 256GB Storage"]),
+    ("boAt Airdopes 141, 42H Playtime, Bluetooth earbuds", ["boAt Airdopes 141, 42H Playtime, Bluetooth earbuds"]),
+    ("- soap\n- shampoo 650ml\n- trimmer", ["soap", "shampoo 650ml", "trimmer"]),
+    ("Philips trimmer, cordless", ["Philips trimmer, cordless"]),
+    ("boAt Rockerz 450, Bluetooth On Ear Headphones", ["boAt Rockerz 450, Bluetooth On Ear Headphones"]),
+    ("Wild Stone Edge Perfume for Men, Long Lasting Fragrance", ["Wild Stone Edge Perfume for Men, Long Lasting Fragrance"]),
+    ("Redmi Note 13 5G, Arctic White", ["Redmi Note 13 5G, Arctic White"]),
+    ("Nivea Men Face Wash, Oil Control, 100 ml", ["Nivea Men Face Wash, Oil Control, 100 ml"]),
+    ("Philips trimmer, cordless; shampoo 650ml", ["Philips trimmer, cordless", "shampoo 650ml"]),
+])
+def test_split_items(message, items):
+    assert split_items(message) == items
+
+
+def test_split_item_keeps_indian_price():
+    details, _ = parse_product(split_items("trimmer under ₹1,500, perfume 100ml")[0])
+    assert details == {"product": "trimmer", "price_max": 1500}
+
+
+@pytest.mark.parametrize("message, details", [
+    ("iPhone 15 Pro Max 256GB", {"product": "iPhone 15 Pro Max 256GB"}),
+    ("Nike Air Max 270 shoes", {"product": "Nike Air Max 270 shoes"}),
+    ("Realme Narzo 60 Max 5G", {"product": "Realme Narzo 60 Max 5G"}),
+    ("trimmer max ₹500", {"product": "trimmer", "price_max": 500}),
+    ("running shoes max price 2000", {"product": "running shoes", "price_max": 2000}),
+    ("Wild Stone Edge Perfume for Men, 100 Ml under 500", {"product": "Wild Stone Edge Perfume for Men", "quantity": "100 Ml", "price_max": 500}),
+    ("atta 5 kg", {"product": "atta", "quantity": "5 kg"}),
+    ("Samsung 55 inch 4K TV under 50k", {"product": "Samsung 55 inch 4K TV", "price_max": 50000}),
+    ("laptop under 1.5 lakh", {"product": "laptop", "price_max": 150000}),
+    ("sofa below 2 lakhs rs", {"product": "sofa", "price_max": 200000}),
+])
+def test_parse_product(message, details):
+    assert parse_product(message)[0] == details
+
+
+def test_price_with_unknown_unit_is_not_confident():
+    _, confidence = parse_product("Samsung TV under 50m")
+    assert confidence < 0.9
@@ -0,0 +1,23 @@
+from contextlib import nullcontext
+import refresher
+
+
+class App:
+    def app_context(self):
+        return nullcontext()
+
+
+def test_popular_products_route_messages_like_chats(monkeypatch):
+    rows = [
+        ("perfume 100ml, trimmer", 3),
+        ("which one is cheaper?", 5),
+        ("trimmer", 2),
+    ]
+    monkeypatch.setattr(refresher, "popular_messages", lambda model, limit, since: rows)
+    monkeypatch.setattr(refresher.ai_processor, "extract_product_details", lambda text: {"product": text})
+
+    products = refresher.PriceRefresher(App(), None).popular_products()
+    assert [details for _, details in products] == [
+        {"product": "trimmer"},
+        {"product": "perfume", "quantity": "100 ml"},
+    ]
@@ -0,0 +1,68 @@
+import asyncio
+from resilience import CircuitBreaker, TokenBucket
+
+
+def test_breaker_trips_on_failure_rate():
+    breaker = CircuitBreaker(failure_rate=0.5, window=10, min_calls=4)
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_needs_min_calls():
+    breaker = CircuitBreaker(min_calls=4)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_released_probe_lets_the_next_one_through():
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.allow()
+
+
+def test_failed_probe_opens_again():
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=30)
+    breaker.record_failure()
+    breaker._opened_at -= 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_bucket_allows_a_burst_then_waits():
+    bucket = TokenBucket(rate=1, capacity=2)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert 0 < bucket.wait_time() <= 1
+
+
+def test_bucket_acquire_gives_up_past_max_wait():
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.try_acquire()
+    assert not asyncio.run(bucket.acquire(0.1))
+
+
+def test_bucket_acquire_waits_for_refill():
+    bucket = TokenBucket(rate=100, capacity=1)
+    assert bucket.try_acquire()
+    assert asyncio.run(bucket.acquire(1))
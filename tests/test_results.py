@@ -0,0 +1,33 @@
+import pytest
+from results import ProductResult, UnreadableAnswerError, extract_json, parse_price, parse_rating
+
+
+def test_agent_json_in_prose():
+    output = 'Here is the best deal:\n```json\n{"product_name": "Trimmer X", "price": "₹1,299", "rating": "4.2 out of 5"}\n```'
+    result = ProductResult.from_agent_output(output, "https://example.com")
+    assert result.to_dict() == {
+        "available": True,
+        "product_name": "Trimmer X",
+        "price": 1299.0,
+        "rating": 4.2,
+        "purchase_url": "https://example.com",
+    }
+
+
+def test_explicit_not_available_is_a_result():
+    result = ProductResult.from_agent_output("The product is not available on this store.")
+    assert not result.available
+
+
+@pytest.mark.parametrize("output", [None, "", "I clicked the search box."])
+def test_unreadable_answer_raises(output):
+    with pytest.raises(UnreadableAnswerError):
+        ProductResult.from_agent_output(output)
+
+
+def test_parsers():
+    assert parse_price("₹1,29,999.50") == 129999.5
+    assert parse_price("N/A") is None
+    assert parse_rating("4.5 out of 5 stars") == 4.5
+    assert parse_rating(7) is None
+    assert extract_json('done: [{"a": 1}]') == [{"a": 1}]
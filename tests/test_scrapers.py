@@ -0,0 +1,118 @@
+import asyncio
+import os
+import pytest
+import scrapers
+from amazon import AmazonAdapter
+from flipkart import FlipkartAdapter
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def amazon():
+    adapter = AmazonAdapter()
+    adapter.base_url = "https://www.amazon.in"
+    return adapter
+
+
+@pytest.fixture
+def flipkart():
+    adapter = FlipkartAdapter()
+    adapter.base_url = "https://www.flipkart.com"
+    return adapter
+
+
+def test_amazon_search_skips_sponsored_cards(amazon):
+    results = amazon.parse_search_results(fixture("amazon_search.html"))
+    assert [r["product_name"] for r in results] == [
+        "Wild Stone Edge Perfume for Men, 100ml | Long Lasting Woody Fragrance",
+        "Wild Stone Edge Perfume for Men, 50ml",
+        "Wild Stone Edge Gift Set for Men (Perfume 100ml + Deodorant 150ml)",
+    ]
+    first = results[0]
+    assert first["price"] == "₹449"
+    assert first["rating"] == "4.1"
+    assert first["purchase_url"].startswith("https://www.amazon.in/Wild-Stone-Perfume-Men-100ml/dp/B07N1KXS3G/")
+    # An unavailable listing has no price
+    assert results[2]["price"] == ""
+
+
+def test_amazon_product_page(amazon):
+    url = "https://www.amazon.in/dp/B07N1KXS3G"
+    assert amazon.parse_product_page(fixture("amazon_product.html"), url) == {
+        "product_name": "Wild Stone Edge Perfume for Men, 100ml | Long Lasting Woody Fragrance",
+        "price": "₹449.00",
+        "rating": "4.1",
+        "purchase_url": url,
+    }
+
+
+def test_flipkart_search_grid_layout(flipkart):
+    results = flipkart.parse_search_results(fixture("flipkart_search_grid.html"))
+    assert [(r["product_name"], r["price"], r["rating"]) for r in results] == [
+        ("Wild Stone EDGE Perfume - 100 ml", "₹389", "4.2"),
+        ("Wild Stone EDGE & CODE Perfume Combo - 200 ml", "₹1,049", "4.3"),
+    ]
+    assert results[0]["purchase_url"].startswith(
+        "https://www.flipkart.com/wild-stone-edge-perfume-men-100-ml/p/itm3ac9d3c2a8f0e?pid=PFMFZ3HYGX4KQ8NZ"
+    )
+
+
+def test_flipkart_search_list_layout(flipkart):
+    results = flipkart.parse_search_results(fixture("flipkart_search_list.html"))
+    assert [(r["product_name"], r["price"], r["rating"]) for r in results] == [
+        ("SAMSUNG Galaxy S23 5G (Cream, 256 GB)", "₹54,999", "4.5"),
+        ("SAMSUNG Galaxy S23 Ultra 5G (Green, 256 GB)", "₹74,999", "N/A"),
+    ]
+
+
+def test_flipkart_product_page(flipkart):
+    url = "https://www.flipkart.com/wild-stone-edge-perfume-men-100-ml/p/itm3ac9d3c2a8f0e"
+    details = flipkart.parse_product_page(fixture("flipkart_product.html"), url)
+    assert details == {
+        "product_name": "Wild Stone EDGE Perfume - 100 ml (For Men)",
+        "price": "₹389",
+        "rating": "4.2",
+        "purchase_url": url,
+    }
+
+
+@pytest.mark.parametrize("price_max, expected", [
+    (None, "₹449"),
+    (400, "₹299"),
+    ("₹500", "₹449"),
+    ("Rs. 350", "₹299"),
+])
+def test_pick_result_price_cap(amazon, price_max, expected):
+    results = amazon.parse_search_results(fixture("amazon_search.html"))
+    details = {"product": "wild stone edge perfume", "price_max": price_max}
+    assert scrapers.pick_result(results, details)["price"] == expected
+
+
+def test_scrape_over_budget(amazon, monkeypatch):
+    async def fetch(url):
+        return fixture("amazon_search.html")
+
+    monkeypatch.setattr(scrapers, "fetch", fetch)
+    details = {"product": "wild stone edge perfume", "price_max": 250}
+    url = scrapers.search_url(amazon.base_url, amazon.search_path, amazon.search_param, details)
+    result = asyncio.run(scrapers.scrape(details, url, amazon.parse_search_results))
+    assert result["available"] is False
+    assert result["reason"] == "Product not available within the price limit"
+
+
+def test_scrape_picks_result(amazon, monkeypatch):
+    async def fetch(url):
+        return fixture("amazon_search.html")
+
+    monkeypatch.setattr(scrapers, "fetch", fetch)
+    details = {"product": "wild stone edge perfume", "quantity": "100ml"}
+    url = scrapers.search_url(amazon.base_url, amazon.search_path, amazon.search_param, details)
+    result = asyncio.run(scrapers.scrape(details, url, amazon.parse_search_results))
+    assert result["price"] == "₹449"
+    assert result["rating"] == "4.1"
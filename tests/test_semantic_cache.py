@@ -0,0 +1,43 @@
+import pytest
+from semantic_cache import SemanticCache
+
+SEEDED = {
+    "Wild Stone Edge perfume for men 100ml": "men's perfume reply",
+    "Davidoff Cool Water EDT 125ml": "EDT reply",
+    "Samsung Galaxy S23 8GB 256GB": "S23 reply",
+}
+
+
+@pytest.fixture
+def cache():
+    cache = SemanticCache(max_entries=10, path=None)
+    for query, reply in SEEDED.items():
+        cache.set(query, reply)
+    return cache
+
+
+@pytest.mark.parametrize("query", [
+    "Wild Stone Edge perfume for women 100ml",
+    "Wild Stone Code perfume for men 100ml",
+    "Davidoff Cool Water EDP 125ml",
+    "Davidoff Cool Water Eau de Parfum 125ml",
+    "Samsung Galaxy S23 Ultra 8GB 256GB",
+    "Samsung Galaxy S23 8GB 128GB",
+    "Samsung Galaxy A23 8GB 256GB",
+    "Wild Stone Edge perfume for men 50ml",
+])
+def test_different_products_miss(cache, query):
+    assert cache.get(query) is None
+
+
+@pytest.mark.parametrize("query, reply", [
+    ("wild stone edge perfume for mens, 100 ML", "men's perfume reply"),
+    ("Wild Stone Edge Men Perfume 100 ml", "men's perfume reply"),
+    ("Wild Stone Edge EDP men 100 Ml", "men's perfume reply"),
+    ("wildstone edge perfume 100ml", "men's perfume reply"),
+    ("wild ston edge perfume for men 100ml", "men's perfume reply"),
+    ("Davidoff Cool Water Eau de Toilette 125 ml", "EDT reply"),
+    ("samsung galaxy s23 256GB 8GB", "S23 reply"),
+])
+def test_paraphrases_hit(cache, query, reply):
+    assert cache.get(query) == reply
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from singleflight import SingleFlight, ThreadSingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    calls = []
+
+    async def lookup():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.do("key", lookup) for _ in range(3)))
+        return results, flight.in_flight()
+
+    results, in_flight = asyncio.run(main())
+    assert results == ["result"] * 3
+    assert calls == [1]
+    assert in_flight == 0
+
+
+def test_error_reaches_every_caller():
+    async def lookup():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("store down")
+
+    async def main():
+        flight = SingleFlight("test")
+        return await asyncio.gather(*(flight.do("key", lookup) for _ in range(2)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert [str(e) for e in errors] == ["store down", "store down"]
+
+
+def test_cancelling_the_last_waiter_cancels_the_run():
+    async def main():
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def lookup():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        flight = SingleFlight("test")
+        waiter = asyncio.ensure_future(flight.do("key", lookup))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        return flight.in_flight()
+
+    assert asyncio.run(main()) == 0
+
+
+def test_cancelling_one_waiter_keeps_the_run():
+    async def main():
+        started = asyncio.Event()
+
+        async def lookup():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "result"
+
+        flight = SingleFlight("test")
+        first = asyncio.ensure_future(flight.do("key", lookup))
+        second = asyncio.ensure_future(flight.do("key", lookup))
+        await started.wait()
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "result"
+
+
+def test_thread_error_reaches_every_caller():
+    flight = ThreadSingleFlight("test")
+    release = threading.Event()
+    errors = []
+
+    def lookup():
+        release.wait(1)
+        raise RuntimeError("crew failed")
+
+    def call():
+        try:
+            flight.do("key", lookup)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert errors == ["crew failed"] * 3
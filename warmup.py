@@ -0,0 +1,70 @@
+from dotenv import load_dotenv
+import importlib
+import threading
+import time
+import os
+import metrics
+import llm_clients
+
+# Load environment variables
+load_dotenv()
+
+# The AI and browser libraries are imported on first use so the web server
+# starts in well under a second. A serving process calls start() to load them
+# in the background instead; /ready reports when that has finished.
+
+WARMUP = os.getenv("WARMUP", "1") == "1"
+
+# Slow-loading libraries the chat pipeline needs
+HEAVY_MODULES = ("crewai", "langchain_groq", "langchain_google_genai", "browser_use")
+
+# One-off startup costs, kept out of the chat pipeline's stage latencies
+import_seconds = metrics.histogram("warmup_import_seconds", "Time to import each heavy library during warm-up, by module")
+
+_state = {"status": "cold", "started_at": None, "seconds": None, "error": None}
+_lock = threading.Lock()
+
+def warm_up():
+    """Import the AI stack and build the shared LLM clients"""
+    for name in HEAVY_MODULES:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        import_seconds.observe(time.perf_counter() - started, module=name)
+    # Without a Groq key the crew steps are unavailable, not the chat pipeline
+    if llm_clients.has_groq_key():
+        llm = llm_clients.groq_llm()
+        # Agents are built per request; building one of each now loads the rest of CrewAI
+        for name in llm_clients.AGENT_DEFINITIONS:
+            llm_clients.agent(name, llm)
+    llm_clients.gemini_llm()
+
+def _run():
+    try:
+        warm_up()
+    except Exception as e:
+        print(f"Error warming up the chat pipeline: {e}")
+        with _lock:
+            _state.update(status="failed", error=str(e))
+        return
+    with _lock:
+        _state.update(status="ready", seconds=round(time.time() - _state["started_at"], 3))
+
+def start():
+    """Warm up in a background thread, once per process, if WARMUP is on"""
+    if not WARMUP:
+        return
+    with _lock:
+        if _state["status"] != "cold":
+            return
+        _state.update(status="warming", started_at=time.time())
+    threading.Thread(target=_run, name="warmup", daemon=True).start()
+
+def status():
+    """Warm-up state for the readiness endpoint"""
+    with _lock:
+        return dict(_state)
+
+def ready():
+    """Whether the process can serve chats without loading the AI stack first"""
+    # With WARMUP off the stack loads on the first chat instead
+    return not WARMUP or status()["status"] == "ready"